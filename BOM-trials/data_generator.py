@@ -1,7 +1,9 @@
 # data_generator.py
 
 import random
+import numpy as np
 from config import *
+from bom_explosion import BOMExplosion
 
 
 class DataGenerator:
@@ -12,6 +14,7 @@ class DataGenerator:
         self.modules = []
         self.parts = []
         self.edges = []
+        self.bom = None
 
     def generate_data(self):
         self._generate_business_group()
@@ -20,6 +23,7 @@ class DataGenerator:
         self._generate_modules()
         self._generate_parts()
         self._generate_edges()
+        self._explode_demand()
 
     def _generate_business_group(self):
         self.business_group = {
@@ -114,7 +118,6 @@ class DataGenerator:
                     'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
                     'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
                 })
-                module['demand'] += po['demand'] * quantity
 
     def _connect_modules_to_parts(self):
         for module in self.modules:
@@ -130,7 +133,15 @@ class DataGenerator:
                     'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
                     'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
                 })
-                part['demand'] += module['demand'] * quantity
+
+    def _explode_demand(self):
+        """Gross demand of every module and part: the offerings' demand exploded through every level of the BOM."""
+        nodes = [self.business_group, *self.product_families, *self.product_offerings, *self.modules, *self.parts]
+        self.bom = BOMExplosion.from_edges([node['id'] for node in nodes], self.edges)
+        gross = self.bom.explode(self.bom.demand_vector({po['id']: po['demand'] for po in self.product_offerings}))
+        first_module = len(nodes) - len(self.modules) - len(self.parts)
+        for node, value in zip(nodes[first_module:], np.rint(gross[first_module:]).astype(np.int64).tolist()):
+            node['demand'] = value
 
     def get_data(self):
         return {
@@ -0,0 +1,120 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class BOMExplosion:
+    """Gross demand of every node of a bill of materials of any depth.
+
+    Nodes are ordered into topological levels (a node's level is the longest chain of edges above it), and the
+    quantity edges leaving each level form one sparse matrix. Exploding demand walks the levels top-down: once
+    every parent of a level has its final gross demand, one sparse mat-vec pushes it to all the children.
+    A 2-D demand array is exploded for all of its columns (scenarios) in the same pass.
+    """
+
+    def __init__(self, num_nodes, sources, targets, quantities, node_ids=None):
+        """Edges are given as node positions in range(num_nodes); `node_ids` names the positions for the
+        {node_id: demand} helpers."""
+        n = num_nodes
+        self.num_nodes = num_nodes
+        self.node_ids = node_ids
+        self._positions = None
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.float64)
+
+        self.level = np.full(n, -1, dtype=np.int64)
+        order = np.argsort(sources, kind='stable')
+        sources, targets, quantities = sources[order], targets[order], quantities[order]
+        starts = np.searchsorted(sources, np.arange(n + 1))
+        # Children of every node as CSR slices, for propagate()
+        self._starts, self._targets, self._quantities = starts, targets, quantities
+        in_degree = np.bincount(targets, minlength=n)
+        frontier = np.flatnonzero(in_degree == 0)
+        self._levels = []
+        depth = 0
+        while len(frontier):
+            self.level[frontier] = depth
+            counts = starts[frontier + 1] - starts[frontier]
+            offsets = np.repeat(starts[frontier] - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+            edges = offsets + np.arange(int(counts.sum()))
+            if len(edges):
+                # Maps the parents' demand (columns) onto the demand they add to every node (rows)
+                parents = np.repeat(np.arange(len(frontier)), counts)
+                matrix = csr_matrix((quantities[edges], (targets[edges], parents)), shape=(n, len(frontier)))
+                self._levels.append((frontier, matrix))
+            removed = np.bincount(targets[edges], minlength=n)
+            in_degree -= removed
+            frontier = np.flatnonzero((removed > 0) & (in_degree == 0))
+            depth += 1
+        if (self.level < 0).any():
+            raise ValueError("The bill of materials has a cycle")
+
+    @classmethod
+    def from_edges(cls, node_ids, edges):
+        """Engine over edge dicts with source_id, target_id and quantity, as produced by the data generators."""
+        node_ids = list(node_ids)
+        positions = {node: i for i, node in enumerate(node_ids)}
+        sources = [positions[edge['source_id']] for edge in edges]
+        targets = [positions[edge['target_id']] for edge in edges]
+        quantities = [edge['quantity'] for edge in edges]
+        return cls(len(node_ids), sources, targets, quantities, node_ids)
+
+    @classmethod
+    def from_graph(cls, G, quantity='quantity'):
+        node_ids = list(G.nodes())
+        positions = {node: i for i, node in enumerate(node_ids)}
+        edges = [(positions[u], positions[v], q) for u, v, q in G.edges(data=quantity, default=1)]
+        sources, targets, quantities = zip(*edges) if edges else ((), (), ())
+        return cls(len(node_ids), sources, targets, quantities, node_ids)
+
+    def position(self, node):
+        if self._positions is None:
+            self._positions = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        return self._positions[node]
+
+    def demand_vector(self, demand):
+        """Dense independent demand from {node_id: demand}; other nodes get none."""
+        vector = np.zeros(self.num_nodes)
+        for node, value in demand.items():
+            vector[self.position(node)] = value
+        return vector
+
+    def explode(self, demand):
+        """Gross demand from independent demand, shape (n,) for one scenario or (n, scenarios) for many."""
+        gross = np.array(demand, dtype=np.float64)
+        for parents, matrix in self._levels:
+            gross += matrix @ gross[parents]
+        return gross
+
+    def propagate(self, positions, deltas):
+        """Change in gross demand below the nodes at `positions` when their independent demand changes by `deltas`.
+
+        Returns (positions, changes) of every node whose gross demand changes, the given ones included. Only the
+        descendants of the changed nodes are visited: pending changes are merged per node and released a level at
+        a time, lowest first, so each node pushes its total change to its children once.
+        """
+        pending = np.asarray(positions, dtype=np.int64)
+        changes = np.asarray(deltas, dtype=np.float64)
+        done, done_changes = [], []
+        while len(pending):
+            pending, inverse = np.unique(pending, return_inverse=True)
+            changes = np.bincount(inverse, weights=changes)
+            ready = self.level[pending] == self.level[pending].min()
+            nodes, node_changes = pending[ready], changes[ready]
+            done.append(nodes)
+            done_changes.append(node_changes)
+            counts = self._starts[nodes + 1] - self._starts[nodes]
+            edges = np.repeat(self._starts[nodes] - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+            edges += np.arange(len(edges))
+            pending = np.concatenate([pending[~ready], self._targets[edges]])
+            changes = np.concatenate([changes[~ready], np.repeat(node_changes, counts) * self._quantities[edges]])
+        if not done:
+            return pending, changes
+        return np.concatenate(done), np.concatenate(done_changes)
+
+    def explosion_matrix(self, inputs):
+        """Sparse (n, len(inputs)) matrix mapping the demand of the `inputs` positions to every node's gross demand,
+        so later scenarios over the same inputs cost one sparse product each."""
+        unit = np.zeros((self.num_nodes, len(inputs)))
+        unit[np.asarray(inputs, dtype=np.int64), np.arange(len(inputs))] = 1
+        return csr_matrix(self.explode(unit))
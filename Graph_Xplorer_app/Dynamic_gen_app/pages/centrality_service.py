@@ -0,0 +1,79 @@
+import hashlib
+from collections import OrderedDict
+import networkx as nx
+
+DEFAULT_MEMORY_BUDGET = 128 * 1024 * 1024
+# Rough cost of one node -> float entry of a result dict: hash table slot plus the float object
+_BYTES_PER_ENTRY = 100
+
+MEASURES = {
+    'Degree Centrality': nx.degree_centrality,
+    'Betweenness Centrality': nx.betweenness_centrality,
+    'Closeness Centrality': nx.closeness_centrality,
+}
+
+
+class CentralityCache:
+    """Centrality results keyed on (graph version, measure), evicted LRU under a memory budget."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, measure, compute):
+        key = (version, measure)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        result = compute()
+        self._entries[key] = result
+        self._evict()
+        return result
+
+    def invalidate(self, version=None):
+        """Drop the results of one graph version, or of every version."""
+        for key in [key for key in self._entries if version is None or key[0] == version]:
+            del self._entries[key]
+
+    def nbytes(self):
+        return sum(_BYTES_PER_ENTRY * len(result) for result in self._entries.values())
+
+    def _evict(self):
+        # The most recent result always stays, even when it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes() > self.memory_budget:
+            self._entries.popitem(last=False)
+
+
+_centrality_cache = None
+
+
+def get_centrality_cache():
+    global _centrality_cache
+    if _centrality_cache is None:
+        _centrality_cache = CentralityCache()
+    return _centrality_cache
+
+
+def graph_version(G):
+    """The fingerprint set when the graph was generated, else a hash of its nodes and edges."""
+    fingerprint = G.graph.get('fingerprint')
+    if fingerprint is None:
+        digest = hashlib.sha256()
+        for node in G.nodes():
+            digest.update(repr(node).encode('utf-8'))
+        digest.update(b'|')
+        for u, v in G.edges():
+            digest.update(f'{u!r}-{v!r};'.encode('utf-8'))
+        fingerprint = digest.hexdigest()
+    return fingerprint
+
+
+def centrality(G, measure, version=None):
+    """{node: value} for one of MEASURES, computed once per graph version (by default graph_version(G))."""
+    version = graph_version(G) if version is None else version
+    return get_centrality_cache().get(version, measure, lambda: MEASURES[measure](G))
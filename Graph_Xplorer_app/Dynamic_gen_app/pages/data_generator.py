@@ -1,7 +1,9 @@
 import random
 from datetime import datetime, timedelta
 import math
+import numpy as np
 from .config import *
+from .bom_explosion import BOMExplosion
 
 class DataGenerator:
     def __init__(self, start_date, end_date, interval_days, num_modules, num_parts):
@@ -15,6 +17,7 @@ class DataGenerator:
         self.modules = []
         self.parts = []
         self.edges = []
+        self.bom = None
         self.time_series_data = {}
         self.num_modules = num_modules
         self.num_parts = num_parts
@@ -95,6 +98,7 @@ class DataGenerator:
         self._connect_product_families_to_product_offerings()
         self._connect_product_offerings_to_modules()
         self._connect_modules_to_parts()
+        self._explode_demand()
 
     def _connect_business_group_to_product_families(self):
         for pf in self.product_families:
@@ -132,7 +136,6 @@ class DataGenerator:
                     'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
                     'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
                 })
-                module['demand'] += po['demand'] * quantity
 
     def _connect_modules_to_parts(self):
         for module in self.modules:
@@ -148,7 +151,15 @@ class DataGenerator:
                     'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
                     'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
                 })
-                part['demand'] += module['demand'] * quantity
+
+    def _explode_demand(self):
+        """Gross demand of every module and part: the offerings' demand exploded through every level of the BOM."""
+        nodes = [self.business_group, *self.product_families, *self.product_offerings, *self.modules, *self.parts]
+        self.bom = BOMExplosion.from_edges([node['id'] for node in nodes], self.edges)
+        gross = self.bom.explode(self.bom.demand_vector({po['id']: po['demand'] for po in self.product_offerings}))
+        first_module = len(nodes) - len(self.modules) - len(self.parts)
+        for node, value in zip(nodes[first_module:], np.rint(gross[first_module:]).astype(np.int64).tolist()):
+            node['demand'] = value
 
     def _generate_time_series_data(self):
         for timestamp in self.timestamps:
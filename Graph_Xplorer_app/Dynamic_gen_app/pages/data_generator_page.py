@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import time
 from .data_generator import DataGenerator
 import pickle
+from .centrality_service import get_centrality_cache
 
 
 def data_generator_page():
@@ -34,6 +35,7 @@ def data_generator_page():
 
             # Save the generated data to session state
             st.session_state['generated_data'] = data
+            get_centrality_cache().invalidate()
 
             # # Save the data to a file
             with open('generated_data.pkl', 'wb') as f:
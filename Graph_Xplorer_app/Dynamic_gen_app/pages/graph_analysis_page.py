@@ -1,7 +1,9 @@
 import streamlit as st
 import networkx as nx
 import plotly.graph_objs as go
+import os
 import pickle
+from .centrality_service import MEASURES, centrality
 
 def graph_analysis_page():
     st.header("Graph Analysis and Querying")
@@ -31,7 +33,8 @@ def graph_analysis_page():
     elif analysis_option == "Shortest Path":
         shortest_path_visualization(G)
     elif analysis_option == "Centrality Measures":
-        centrality_measures(G)
+        # The graph is rebuilt from the pickle on every rerun; the file version and timestamp identify it
+        centrality_measures(G, version=(os.path.getmtime('generated_data.pkl'), selected_timestamp))
 
 def subgraph_visualization(G):
     st.write("Visualize a subgraph based on a selected node")
@@ -128,26 +131,19 @@ def shortest_path_visualization(G):
         except nx.NetworkXNoPath:
             st.error("No path exists between the selected nodes.")
 
-def centrality_measures(G):
+def centrality_measures(G, version=None):
     st.write("Calculate and visualize centrality measures")
 
-    centrality_option = st.selectbox("Choose a centrality measure",
-                                     ["Degree Centrality", "Betweenness Centrality", "Closeness Centrality"])
+    centrality_option = st.selectbox("Choose a centrality measure", list(MEASURES))
+    values = centrality(G, centrality_option, version)
 
-    if centrality_option == "Degree Centrality":
-        centrality = nx.degree_centrality(G)
-    elif centrality_option == "Betweenness Centrality":
-        centrality = nx.betweenness_centrality(G)
-    elif centrality_option == "Closeness Centrality":
-        centrality = nx.closeness_centrality(G)
-
-    nx.set_node_attributes(G, centrality, 'centrality')
+    nx.set_node_attributes(G, values, 'centrality')
 
     fig = plot_graph(G, color_by='centrality')
     st.plotly_chart(fig, use_container_width=True)
 
     st.write("Top 10 nodes by centrality measure:")
-    top_nodes = sorted(centrality.items(), key=lambda x: x[1], reverse=True)[:10]
+    top_nodes = sorted(values.items(), key=lambda x: x[1], reverse=True)[:10]
     for node, score in top_nodes:
         st.write(f"{node}: {score:.4f}")
 
@@ -1,5 +1,6 @@
 import streamlit as st
 from pages import graph_generation, graph_analysis, graph_subgraph, graph_shortest_path
+from pages.performance_utils import MODES, get_measurement_mode, measurement_mode
 
 PAGES = {
     "Home": "home",
@@ -30,11 +31,16 @@ def main():
 
     st.sidebar.title("Navigation")
     selection = st.sidebar.radio("Go to", list(PAGES.keys()))
+    # Kept in this session's state; the process-wide default only sets the initial choice
+    mode = st.sidebar.selectbox("Measurement mode", MODES, index=MODES.index(get_measurement_mode()),
+                                key="measurement_mode",
+                                help="'timing' is cheapest, 'tracemalloc' slows allocation-heavy code")
 
     if selection == "Home":
         home()
     else:
-        PAGES[selection].show()
+        with measurement_mode(mode):
+            PAGES[selection].show()
 
     st.sidebar.markdown("---")
 
@@ -0,0 +1,97 @@
+import hashlib
+from collections import OrderedDict
+import networkx as nx
+from .span_tracer import span
+from .approx_betweenness import betweenness_estimate
+
+DEFAULT_MEMORY_BUDGET = 128 * 1024 * 1024
+# Rough cost of one node -> float entry of a result dict: hash table slot plus the float object
+_BYTES_PER_ENTRY = 100
+
+MEASURES = {
+    'Degree Centrality': nx.degree_centrality,
+    # Exact up to EXACT_MAX_NODES, pivot-sampled above; see betweenness() for the error estimate
+    'Betweenness Centrality': lambda G: betweenness_estimate(G, seed=0)[0],
+    'Closeness Centrality': nx.closeness_centrality,
+}
+
+
+def _result_bytes(result):
+    # Results are node -> value dicts, or tuples holding several of them
+    dicts = result if isinstance(result, tuple) else (result,)
+    return _BYTES_PER_ENTRY * sum(len(part) for part in dicts if isinstance(part, dict))
+
+
+class CentralityCache:
+    """Centrality results keyed on (graph version, measure), evicted LRU under a memory budget."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, measure, compute):
+        key = (version, measure)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        with span(f"compute {measure}"):
+            result = compute()
+        self._entries[key] = result
+        self._evict()
+        return result
+
+    def invalidate(self, version=None):
+        """Drop the results of one graph version, or of every version."""
+        for key in [key for key in self._entries if version is None or key[0] == version]:
+            del self._entries[key]
+
+    def nbytes(self):
+        return sum(_result_bytes(result) for result in self._entries.values())
+
+    def _evict(self):
+        # The most recent result always stays, even when it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes() > self.memory_budget:
+            self._entries.popitem(last=False)
+
+
+_centrality_cache = None
+
+
+def get_centrality_cache():
+    global _centrality_cache
+    if _centrality_cache is None:
+        _centrality_cache = CentralityCache()
+    return _centrality_cache
+
+
+def graph_version(G):
+    """The fingerprint set when the graph was generated, else a hash of its nodes and edges."""
+    fingerprint = G.graph.get('fingerprint')
+    if fingerprint is None:
+        digest = hashlib.sha256()
+        for node in G.nodes():
+            digest.update(repr(node).encode('utf-8'))
+        digest.update(b'|')
+        for u, v in G.edges():
+            digest.update(f'{u!r}-{v!r};'.encode('utf-8'))
+        fingerprint = digest.hexdigest()
+    return fingerprint
+
+
+def centrality(G, measure, version=None):
+    """{node: value} for one of MEASURES, computed once per graph version (by default graph_version(G))."""
+    version = graph_version(G) if version is None else version
+    return get_centrality_cache().get(version, measure, lambda: MEASURES[measure](G))
+
+
+def betweenness(G, k=None, epsilon=None, workers=1, version=None):
+    """(values, std_errors, pivots) from approx_betweenness.betweenness_estimate, cached per graph version and
+    sampling setting. The pivot sample is seeded so a cached and a recomputed estimate agree."""
+    version = graph_version(G) if version is None else version
+    return get_centrality_cache().get(version, ('Betweenness Centrality', k, epsilon),
+                                      lambda: betweenness_estimate(G, k, epsilon, workers=workers, seed=0))
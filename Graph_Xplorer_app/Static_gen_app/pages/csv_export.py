@@ -0,0 +1,127 @@
+import csv
+import io
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+import numpy as np
+from .node_table import NodeTable, EdgeTable
+from .span_tracer import span
+
+# Rows formatted per write into a ZIP entry
+CHUNK_ROWS = 100_000
+# Archives larger than this are kept in a temporary file instead of memory
+SPILL_BYTES = 64 * 1024 * 1024
+MAX_CACHED_EXPORTS = 2
+
+
+def _table_chunks(table):
+    """CSV lines of a NodeTable or EdgeTable, CHUNK_ROWS rows at a time, built from its arrays."""
+    for start in range(0, len(table), CHUNK_ROWS):
+        end = min(start + CHUNK_ROWS, len(table))
+        if isinstance(table, EdgeTable):
+            keys = ['source_id', 'target_id', *table.columns]
+            columns = [table.ids(table.sources[start:end]), table.ids(table.targets[start:end])]
+        else:
+            keys = ['id', 'name', *table.columns]
+            rows = np.arange(start, end)
+            columns = [table.ids(rows), table.names(rows)]
+        columns += [map(str, column[start:end].tolist()) for column in table.columns.values()]
+        lines = '\r\n'.join(map(','.join, zip(*columns))) + '\r\n'
+        yield (','.join(keys) + '\r\n' + lines) if start == 0 else lines
+
+
+def write_csv_zip(data, file):
+    """Write every table of `data` to `file` as a ZIP of CSV files, one entry per table, streamed row chunks
+    straight into the entry."""
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for key, items in data.items():
+            if key == 'business_group':
+                items = [items]  # Convert single dict to list for consistent processing
+            with zip_file.open(f"{key}.csv", 'w') as entry:
+                if isinstance(items, (NodeTable, EdgeTable)):
+                    for chunk in _table_chunks(items):
+                        entry.write(chunk.encode())
+                elif items:
+                    output = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                    writer = csv.DictWriter(output, fieldnames=items[0].keys())
+                    writer.writeheader()
+                    writer.writerows(items)
+                    output.flush()
+                    output.detach()
+
+
+class _Export:
+    """A cached archive. Reads of one archive are serialized, and an archive evicted while being read is closed
+    by its last reader."""
+
+    def __init__(self, file):
+        self.file = file
+        self.lock = threading.Lock()
+        self.readers = 0
+        self.evicted = False
+
+    def read(self):
+        with self.lock:
+            self.file.seek(0)
+            return self.file.read()
+
+
+_exports = OrderedDict()
+# Shared by every session: guards the cache and the reader counts, never held while writing or reading an archive
+_lock = threading.Lock()
+
+
+def _evict(export):
+    export.evicted = True
+    if not export.readers:
+        export.file.close()
+
+
+def csv_zip(generator):
+    """Key of the generator's CSV ZIP in the export cache, writing the archive once per graph version and demand
+    update.
+
+    The archive is spooled: it stays in memory up to SPILL_BYTES and moves to a temporary file beyond that.
+    """
+    key = (generator.G.graph.get('fingerprint', id(generator)), generator.demand_version)
+    with _lock:
+        if key in _exports:
+            _exports.move_to_end(key)
+            return key
+    with span("csv export"):
+        file = tempfile.SpooledTemporaryFile(max_size=SPILL_BYTES)
+        write_csv_zip(generator.get_data(), file)
+    with _lock:
+        if key in _exports:
+            # Another session wrote the same version meanwhile
+            file.close()
+        else:
+            _exports[key] = _Export(file)
+        while len(_exports) > MAX_CACHED_EXPORTS:
+            _evict(_exports.popitem(last=False)[1])
+    return key
+
+
+def csv_zip_bytes(generator):
+    """Contents of the generator's CSV ZIP, written on the first call for its version.
+
+    This is one full copy of the archive in memory: st.download_button stores whatever its data callable returns
+    as bytes, so the copy can't be avoided, but it is made outside the cache lock and only when a user downloads.
+    """
+    while True:
+        key = csv_zip(generator)
+        with _lock:
+            export = _exports.get(key)
+            if export is not None:
+                export.readers += 1
+        if export is None:
+            # Evicted by other sessions between the two steps; write it again
+            continue
+        try:
+            return export.read()
+        finally:
+            with _lock:
+                export.readers -= 1
+                if export.evicted and not export.readers:
+                    export.file.close()
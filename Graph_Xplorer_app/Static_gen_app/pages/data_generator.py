@@ -1,12 +1,57 @@
 # data_generator_page.py
 
 import random
+import numpy as np
 from .config import *
+from .node_table import NodeTable, EdgeTable
+from .bom_explosion import BOMExplosion
 import networkx as nx
 
+def fan_out(importance_factor):
+    """Number of children of each node: max(1, int(importance_factor * 10))."""
+    return np.maximum(1, (np.asarray(importance_factor) * 10).astype(np.int64))
+
+
+def sample_targets(rng, counts, population):
+    """(sources, targets) with counts[i] distinct targets drawn from range(population) for every source i.
+
+    All targets are drawn at once with replacement; repeated (source, target) pairs are redrawn until none
+    are left, which takes a round or two when counts are small next to the population.
+    """
+    counts = np.minimum(counts, population)
+    sources = np.repeat(np.arange(len(counts)), counts)
+    targets = rng.integers(0, max(population, 1), size=len(sources))
+    while len(sources):
+        order = np.lexsort((targets, sources))
+        sorted_sources, sorted_targets = sources[order], targets[order]
+        repeated = np.flatnonzero((sorted_sources[1:] == sorted_sources[:-1]) &
+                                  (sorted_targets[1:] == sorted_targets[:-1])) + 1
+        if not len(repeated):
+            break
+        targets[order[repeated]] = rng.integers(0, population, size=len(repeated))
+    return sources, targets
+
+
 class DataGenerator:
-    def __init__(self, total_nodes):
+    """Generates the supply chain data and graph.
+
+    With columnar=True, modules and parts are NodeTables of NumPy arrays drawn in one call per feature, edges are
+    an EdgeTable sampled in bulk, and the graph is only built when get_graph() is first called.
+
+    In both modes the demand of modules and parts is the offerings' demand exploded through every level of the
+    bill of materials by a BOMExplosion, kept as self.bom so update_demand() can push later changes down the
+    existing data.
+
+    Every field is drawn from generators seeded with `seed`, so a seed reproduces the same data in either mode (the
+    two modes draw differently and give different data for one seed).
+    """
+
+    def __init__(self, total_nodes, columnar=False, seed=None):
         self.total_nodes = max(total_nodes, MIN_NODES)
+        self.columnar = columnar
+        # self.random for per-record draws, self.rng for the columnar arrays
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
         self.business_group = None
         self.product_families = []
         self.product_offerings = []
@@ -14,31 +59,38 @@ class DataGenerator:
         self.parts = []
         self.edges = []
         self.G = nx.DiGraph()
+        self.bom = None
+        self.demand_version = 0
+        self._graph_built = not columnar
 
     def generate_data(self):
         self._generate_business_group()
         self._generate_product_families()
         self._generate_product_offerings()
         self._generate_modules_and_parts()
-        self._generate_edges()
+        if self.columnar:
+            self._generate_edges_columnar()
+        else:
+            self._generate_edges()
+        self._explode_demand()
 
     def _generate_business_group(self):
         self.business_group = {
             'id': 'BG_001',
             'name': BUSINESS_GROUP,
-            'revenue': random.uniform(*COST_RANGE)
+            'revenue': self.random.uniform(*COST_RANGE)
         }
-        self.G.add_node('BG_001', **self.business_group, type='business_group')
+        self._add_node(self.business_group, 'business_group')
 
     def _generate_product_families(self):
         for i, pf in enumerate(PRODUCT_FAMILIES, 1):
             pf_data = {
                 'id': f'PF_{i:03d}',
                 'name': pf,
-                'revenue': random.uniform(*COST_RANGE)
+                'revenue': self.random.uniform(*COST_RANGE)
             }
             self.product_families.append(pf_data)
-            self.G.add_node(pf_data['id'], **pf_data, type='product_family')
+            self._add_node(pf_data, 'product_family')
 
     def _generate_product_offerings(self):
         po_counter = 1
@@ -47,28 +99,41 @@ class DataGenerator:
                 po_data = {
                     'id': f'PO_{po_counter:03d}',
                     'name': po,
-                    'inventory': random.randint(*INVENTORY_RANGE),
-                    'demand': random.randint(*DEMAND_RANGE),
-                    'production_cost': random.uniform(*COST_RANGE),
-                    'importance_factor': random.uniform(*IMPORTANCE_FACTOR_RANGE)
+                    'inventory': self.random.randint(*INVENTORY_RANGE),
+                    'demand': self.random.randint(*DEMAND_RANGE),
+                    'production_cost': self.random.uniform(*COST_RANGE),
+                    'importance_factor': self.random.uniform(*IMPORTANCE_FACTOR_RANGE)
                 }
                 self.product_offerings.append(po_data)
-                self.G.add_node(po_data['id'], **po_data, type='product_offering')
+                self._add_node(po_data, 'product_offering')
                 po_counter += 1
 
+    def _add_node(self, data, node_type):
+        if not self.columnar:
+            self.G.add_node(data['id'], **data, type=node_type)
+
+    def _add_edge(self, edge_data):
+        self.edges.append(edge_data)
+        self.G.add_edge(edge_data['source_id'], edge_data['target_id'], **edge_data)
+
     def _generate_modules_and_parts(self):
-        remaining_nodes = self.total_nodes - len(self.G.nodes)
+        remaining_nodes = self.total_nodes - (1 + len(self.product_families) + len(self.product_offerings))
         num_modules = int(remaining_nodes * MODULE_PART_RATIO)
         num_parts = remaining_nodes - num_modules
 
+        if self.columnar:
+            self.modules = self._node_table('M', 'Module', num_modules)
+            self.parts = self._node_table('P', 'Part', num_parts)
+            return
+
         for i in range(1, num_modules + 1):
             module_data = {
                 'id': f'M_{i:03d}',
                 'name': f"Module_{i}",
-                'inventory': random.randint(*INVENTORY_RANGE),
-                'importance_factor': random.uniform(*IMPORTANCE_FACTOR_RANGE),
+                'inventory': self.random.randint(*INVENTORY_RANGE),
+                'importance_factor': self.random.uniform(*IMPORTANCE_FACTOR_RANGE),
                 'demand': 0,
-                'cost': random.uniform(*COST_RANGE)
+                'cost': self.random.uniform(*COST_RANGE)
             }
             self.modules.append(module_data)
             self.G.add_node(module_data['id'], **module_data, type='module')
@@ -77,14 +142,23 @@ class DataGenerator:
             part_data = {
                 'id': f'P_{i:03d}',
                 'name': f"Part_{i}",
-                'inventory': random.randint(*INVENTORY_RANGE),
-                'importance_factor': random.uniform(*IMPORTANCE_FACTOR_RANGE),
+                'inventory': self.random.randint(*INVENTORY_RANGE),
+                'importance_factor': self.random.uniform(*IMPORTANCE_FACTOR_RANGE),
                 'demand': 0,
-                'cost': random.uniform(*COST_RANGE)
+                'cost': self.random.uniform(*COST_RANGE)
             }
             self.parts.append(part_data)
             self.G.add_node(part_data['id'], **part_data, type='part')
 
+    def _node_table(self, id_prefix, name_prefix, count):
+        # One vectorized draw per feature, in MODULE_FEATURES / PART_FEATURES order
+        return NodeTable(id_prefix, name_prefix, {
+            'inventory': self.rng.integers(INVENTORY_RANGE[0], INVENTORY_RANGE[1] + 1, size=count),
+            'importance_factor': self.rng.uniform(*IMPORTANCE_FACTOR_RANGE, size=count),
+            'demand': np.zeros(count, dtype=np.int64),
+            'cost': self.rng.uniform(*COST_RANGE, size=count),
+        })
+
     def _generate_edges(self):
         self._connect_business_group_to_product_families()
         self._connect_product_families_to_product_offerings()
@@ -100,8 +174,7 @@ class DataGenerator:
                 'transportation_cost': 0,
                 'transportation_time': 0
             }
-            self.edges.append(edge_data)
-            self.G.add_edge(edge_data['source_id'], edge_data['target_id'], **edge_data)
+            self._add_edge(edge_data)
 
     def _connect_product_families_to_product_offerings(self):
         for pf in self.product_families:
@@ -114,44 +187,173 @@ class DataGenerator:
                         'transportation_cost': 0,
                         'transportation_time': 0
                     }
-                    self.edges.append(edge_data)
-                    self.G.add_edge(edge_data['source_id'], edge_data['target_id'], **edge_data)
+                    self._add_edge(edge_data)
 
     def _connect_product_offerings_to_modules(self):
         for po in self.product_offerings:
             num_connections = max(1, int(po['importance_factor'] * 10))
-            potential_modules = random.sample(self.modules, min(num_connections, len(self.modules)))
+            potential_modules = self.random.sample(self.modules, min(num_connections, len(self.modules)))
 
             for module in potential_modules:
-                quantity = random.randint(*QUANTITY_RANGE)
+                quantity = self.random.randint(*QUANTITY_RANGE)
                 edge_data = {
                     'source_id': po['id'],
                     'target_id': module['id'],
                     'quantity': quantity,
-                    'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
-                    'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
+                    'transportation_cost': self.random.uniform(*TRANSPORTATION_COST_RANGE),
+                    'transportation_time': self.random.uniform(*TRANSPORTATION_TIME_RANGE)
                 }
-                self.edges.append(edge_data)
-                self.G.add_edge(edge_data['source_id'], edge_data['target_id'], **edge_data)
-                module['demand'] += po['demand'] * quantity
+                self._add_edge(edge_data)
 
     def _connect_modules_to_parts(self):
         for module in self.modules:
             num_connections = max(1, int(module['importance_factor'] * 10))
-            potential_parts = random.sample(self.parts, min(num_connections, len(self.parts)))
+            potential_parts = self.random.sample(self.parts, min(num_connections, len(self.parts)))
 
             for part in potential_parts:
-                quantity = random.randint(*QUANTITY_RANGE)
+                quantity = self.random.randint(*QUANTITY_RANGE)
                 edge_data = {
                     'source_id': module['id'],
                     'target_id': part['id'],
                     'quantity': quantity,
-                    'transportation_cost': random.uniform(*TRANSPORTATION_COST_RANGE),
-                    'transportation_time': random.uniform(*TRANSPORTATION_TIME_RANGE)
+                    'transportation_cost': self.random.uniform(*TRANSPORTATION_COST_RANGE),
+                    'transportation_time': self.random.uniform(*TRANSPORTATION_TIME_RANGE)
                 }
-                self.edges.append(edge_data)
-                self.G.add_edge(edge_data['source_id'], edge_data['target_id'], **edge_data)
-                part['demand'] += module['demand'] * quantity
+                self._add_edge(edge_data)
+
+    def _generate_edges_columnar(self):
+        num_families = len(self.product_families)
+        num_offerings = len(self.product_offerings)
+        num_modules = len(self.modules)
+        first_offering = 1 + num_families
+        first_module = first_offering + num_offerings
+        first_part = first_module + num_modules
+        offering_importance = np.array([po['importance_factor'] for po in self.product_offerings])
+
+        family_of = {po: i for i, pf in enumerate(PRODUCT_FAMILIES) for po in PRODUCT_OFFERINGS[pf]}
+        offering_family = np.array([family_of[po['name']] for po in self.product_offerings], dtype=np.int64)
+
+        po_sources, module_targets = sample_targets(self.rng, fan_out(offering_importance), num_modules)
+        module_sources, part_targets = sample_targets(self.rng, fan_out(self.modules.columns['importance_factor']),
+                                                      len(self.parts))
+        po_quantity = self._quantities(len(po_sources))
+        module_quantity = self._quantities(len(module_sources))
+
+        # Structural edges carry quantity 1 and no transportation cost or time
+        num_structural = num_families + num_offerings
+        num_sampled = len(po_sources) + len(module_sources)
+        sources = np.concatenate([np.zeros(num_families, dtype=np.int64), 1 + offering_family,
+                                  first_offering + po_sources, first_module + module_sources])
+        targets = np.concatenate([1 + np.arange(num_families), first_offering + np.arange(num_offerings),
+                                  first_module + module_targets, first_part + part_targets])
+        self.edges = EdgeTable(sources, targets, {
+            'quantity': np.concatenate([np.ones(num_structural, dtype=np.int64), po_quantity, module_quantity]),
+            'transportation_cost': np.concatenate([np.zeros(num_structural),
+                                                   self.rng.uniform(*TRANSPORTATION_COST_RANGE, size=num_sampled)]),
+            'transportation_time': np.concatenate([np.zeros(num_structural),
+                                                   self.rng.uniform(*TRANSPORTATION_TIME_RANGE, size=num_sampled)]),
+        }, self.node_id, self.node_ids)
+
+    def _explode_demand(self):
+        """Gross demand of every module and part from the offerings' independent demand."""
+        first_offering = 1 + len(self.product_families)
+        first_module = first_offering + len(self.product_offerings)
+        num_nodes = first_module + len(self.modules) + len(self.parts)
+        if self.columnar:
+            self.bom = BOMExplosion(num_nodes, self.edges.sources, self.edges.targets, self.edges.columns['quantity'])
+        else:
+            node_ids = [self.business_group['id'], *(pf['id'] for pf in self.product_families),
+                        *(po['id'] for po in self.product_offerings), *(module['id'] for module in self.modules),
+                        *(part['id'] for part in self.parts)]
+            self.bom = BOMExplosion.from_edges(node_ids, self.edges)
+
+        demand = np.zeros(num_nodes)
+        demand[first_offering:first_module] = [po['demand'] for po in self.product_offerings]
+        gross = np.rint(self.bom.explode(demand)).astype(np.int64)
+        if self.columnar:
+            self.modules.columns['demand'][:] = gross[first_module:first_module + len(self.modules)]
+            self.parts.columns['demand'][:] = gross[first_module + len(self.modules):]
+            return
+        for node, value in zip(self.modules + self.parts, gross[first_module:].tolist()):
+            node['demand'] = value
+            self.G.nodes[node['id']]['demand'] = value
+
+    def update_demand(self, demand):
+        """Set new demand for some offerings, given as {offering_id: demand}, and add the resulting change to the
+        gross demand of the modules and parts below them, in the data and in the graph if it is built.
+
+        Returns {node_id: demand} of every node whose demand changed. The cost follows the size of the changed
+        offerings' BOMs, not of the graph.
+        """
+        first_offering = 1 + len(self.product_families)
+        first_module = first_offering + len(self.product_offerings)
+        offerings = {po['id']: i for i, po in enumerate(self.product_offerings)}
+        positions, deltas = [], []
+        for offering_id, value in demand.items():
+            i = offerings[offering_id]
+            positions.append(first_offering + i)
+            deltas.append(value - self.product_offerings[i]['demand'])
+        positions, changes = self.bom.propagate(positions, deltas)
+        changes = np.rint(changes).astype(np.int64)
+        keep = changes != 0
+        positions, changes = positions[keep].tolist(), changes[keep].tolist()
+
+        updated = {}
+        for position, change in zip(positions, changes):
+            if position < first_module:
+                po = self.product_offerings[position - first_offering]
+                po['demand'] += change
+                updated[po['id']] = po['demand']
+                continue
+            rows, i = self._module_or_part(position - first_module)
+            if self.columnar:
+                rows.columns['demand'][i] += change
+                updated[rows.node_id(i)] = rows.columns['demand'][i].item()
+            else:
+                rows[i]['demand'] += change
+                updated[rows[i]['id']] = rows[i]['demand']
+        if self._graph_built:
+            for node, value in updated.items():
+                self.G.nodes[node]['demand'] = value
+        if updated:
+            self.demand_version += 1
+        return updated
+
+    def _module_or_part(self, i):
+        # (modules or parts, row) of the i-th node after the offerings
+        if i < len(self.modules):
+            return self.modules, i
+        return self.parts, i - len(self.modules)
+
+    def _quantities(self, count):
+        return self.rng.integers(QUANTITY_RANGE[0], QUANTITY_RANGE[1] + 1, size=count)
+
+    def node_id(self, position):
+        """Node ID at a position of the columnar layout: business group, families, offerings, modules, parts."""
+        if position == 0:
+            return self.business_group['id']
+        position -= 1
+        for rows in (self.product_families, self.product_offerings):
+            if position < len(rows):
+                return rows[position]['id']
+            position -= len(rows)
+        if position < len(self.modules):
+            return self.modules.node_id(position)
+        return self.parts.node_id(position - len(self.modules))
+
+    def node_ids(self, positions):
+        """node_id() of an array of positions of the columnar layout, as a list."""
+        positions = np.asarray(positions)
+        first_module = 1 + len(self.product_families) + len(self.product_offerings)
+        first_part = first_module + len(self.modules)
+        ids = np.empty(len(positions), dtype=object)
+        is_base = positions < first_module
+        ids[is_base] = [self.node_id(p) for p in positions[is_base].tolist()]
+        is_part = positions >= first_part
+        is_module = ~is_base & ~is_part
+        ids[is_module] = self.modules.ids(positions[is_module] - first_module)
+        ids[is_part] = self.parts.ids(positions[is_part] - first_part)
+        return ids.tolist()
 
     def get_data(self):
         return {
@@ -164,4 +366,16 @@ class DataGenerator:
         }
 
     def get_graph(self):
-        return self.G
\ No newline at end of file
+        """The NetworkX graph, built from the columnar data on the first call in columnar mode."""
+        if not self._graph_built:
+            self._build_graph()
+        return self.G
+
+    def _build_graph(self):
+        self._graph_built = True
+        self.G.add_node(self.business_group['id'], **self.business_group, type='business_group')
+        self.G.add_nodes_from((pf['id'], {**pf, 'type': 'product_family'}) for pf in self.product_families)
+        self.G.add_nodes_from((po['id'], {**po, 'type': 'product_offering'}) for po in self.product_offerings)
+        self.G.add_nodes_from((module['id'], {**module, 'type': 'module'}) for module in self.modules)
+        self.G.add_nodes_from((part['id'], {**part, 'type': 'part'}) for part in self.parts)
+        self.G.add_edges_from((edge['source_id'], edge['target_id'], edge) for edge in self.edges)
\ No newline at end of file
@@ -4,7 +4,9 @@ import streamlit as st
 import networkx as nx
 import plotly.graph_objects as go
 from .graph_analyzer import analyze_graph
-from .performance_utils import measure_performance, format_performance_metrics
+from .performance_utils import measure_performance
+from .graph_generation import session_graph
+from .span_tracer import span, show_phase_breakdown
 
 @measure_performance
 def run_analysis(G):
@@ -27,62 +29,69 @@ def plot_degree_distribution(in_degree_dist, out_degree_dist):
 def show():
     st.title("Graph Analysis")
 
-    if 'graph' not in st.session_state:
+    G = session_graph()
+    if G is None:
         st.warning("Please generate a graph first.")
         return
 
-    G = st.session_state['graph']
-
     if st.button("Run Analysis"):
-        with st.spinner("Analyzing graph..."):
-            analysis, performance_metrics = run_analysis(G)
-
-        st.success("Analysis complete!")
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.subheader("Basic Statistics")
-            st.write(f"Number of nodes: {analysis['num_nodes']}")
-            st.write(f"Number of edges: {analysis['num_edges']}")
-
-            st.subheader("Node Types")
-            for node_type, count in analysis['node_types'].items():
-                st.write(f"{node_type}: {count}")
-
-        with col2:
-            st.subheader("Connectivity Analysis")
-            st.write(f"Is the graph strongly connected? {analysis['is_strongly_connected']}")
-            st.write(f"Number of strongly connected components: {analysis['num_strongly_connected_components']}")
-
-            if 'avg_shortest_path_length' in analysis:
-                st.write(f"Average shortest path length: {analysis['avg_shortest_path_length']:.4f}")
-            else:
-                st.write(f"Average shortest path length in the largest strongly connected component: {analysis['avg_shortest_path_length_largest_scc']:.4f}")
-
-        st.subheader("Degree Distribution")
-        fig = plot_degree_distribution(analysis['in_degree_dist'], analysis['out_degree_dist'])
-        st.plotly_chart(fig, use_container_width=True)
-
-        with st.expander("Centrality Measures"):
-            st.write("Top 5 nodes by degree centrality:")
-            for node, centrality in analysis['top_degree_centrality']:
-                st.write(f"{node}: {centrality:.4f}")
-
-            st.write("Top 5 nodes by betweenness centrality:")
-            for node, centrality in analysis['top_betweenness_centrality']:
-                st.write(f"{node}: {centrality:.4f}")
-
-        with st.expander("Community Detection"):
-            st.write(f"Number of communities detected: {analysis['num_communities']}")
-            st.write(f"Modularity: {analysis['modularity']:.4f}")
-
-        st.subheader("Performance Metrics")
-        st.text(format_performance_metrics(performance_metrics))
+        with span("Graph Analysis") as root:
+            with st.spinner("Analyzing graph..."):
+                analysis, performance_metrics = run_analysis(G)
+
+            st.success("Analysis complete!")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.subheader("Basic Statistics")
+                st.write(f"Number of nodes: {analysis['num_nodes']}")
+                st.write(f"Number of edges: {analysis['num_edges']}")
+
+                st.subheader("Node Types")
+                for node_type, count in analysis['node_types'].items():
+                    st.write(f"{node_type}: {count}")
+
+            with col2:
+                st.subheader("Connectivity Analysis")
+                st.write(f"Is the graph strongly connected? {analysis['is_strongly_connected']}")
+                st.write(f"Number of strongly connected components: {analysis['num_strongly_connected_components']}")
+
+                if 'avg_shortest_path_length' in analysis:
+                    st.write(f"Average shortest path length: {analysis['avg_shortest_path_length']:.4f}")
+                else:
+                    st.write(f"Average shortest path length in the largest strongly connected component: {analysis['avg_shortest_path_length_largest_scc']:.4f}")
+
+            st.subheader("Degree Distribution")
+            fig = plot_degree_distribution(analysis['in_degree_dist'], analysis['out_degree_dist'])
+            with span("streamlit render"):
+                st.plotly_chart(fig, use_container_width=True)
+
+            with st.expander("Centrality Measures"):
+                st.write("Top 5 nodes by degree centrality:")
+                for node, centrality in analysis['top_degree_centrality']:
+                    st.write(f"{node}: {centrality:.4f}")
+
+                st.write("Top 5 nodes by betweenness centrality:")
+                exact = analysis['betweenness_pivots'] >= analysis['num_nodes']
+                for node, centrality in analysis['top_betweenness_centrality']:
+                    error = "" if exact else f" ± {2 * analysis['betweenness_errors'][node]:.4f}"
+                    st.write(f"{node}: {centrality:.4f}{error}")
+                if not exact:
+                    st.caption(f"Estimated from {analysis['betweenness_pivots']:,} sampled pivot nodes; "
+                               "± is about two standard errors, an approximate range rather than a "
+                               "guaranteed interval.")
+
+            with st.expander("Community Detection"):
+                st.write(f"Number of communities detected: {analysis['num_communities']}")
+                st.write(f"Modularity: {analysis['modularity']:.4f}")
+
+        show_phase_breakdown(root, metrics=performance_metrics)
 
         with st.expander("Metrics Explanation"):
             st.info(get_metrics_explanation())
 
+
 def get_metrics_explanation():
     return """
     Explanation of metrics:
@@ -4,6 +4,8 @@ import networkx as nx
 import matplotlib.pyplot as plt
 from collections import defaultdict
 import community
+from .span_tracer import span
+from .centrality_service import centrality, betweenness
 
 
 def analyze_graph(G):
@@ -26,27 +28,36 @@ def analyze_graph(G):
     analysis['out_degree_dist'] = out_degree_dist
 
     # Centrality measures
-    degree_centrality = nx.degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
+    with span("centrality"):
+        # Cached per graph version, so re-running the analysis does not recompute them
+        degree_centrality = centrality(G, 'Degree Centrality')
+        # Exact on small graphs, estimated from sampled pivots on large ones
+        betweenness_centrality, betweenness_errors, pivots = betweenness(G)
     analysis['top_degree_centrality'] = sorted(degree_centrality.items(), key=lambda x: x[1], reverse=True)[:5]
     analysis['top_betweenness_centrality'] = sorted(betweenness_centrality.items(), key=lambda x: x[1], reverse=True)[
                                              :5]
+    analysis['betweenness_pivots'] = pivots
+    analysis['betweenness_errors'] = {node: betweenness_errors[node] for node, _ in
+                                      analysis['top_betweenness_centrality']}
 
     # Connectivity analysis
-    analysis['is_strongly_connected'] = nx.is_strongly_connected(G)
-    analysis['num_strongly_connected_components'] = nx.number_strongly_connected_components(G)
+    with span("connectivity"):
+        analysis['is_strongly_connected'] = nx.is_strongly_connected(G)
+        analysis['num_strongly_connected_components'] = nx.number_strongly_connected_components(G)
 
     # Path analysis
-    if analysis['is_strongly_connected']:
-        analysis['avg_shortest_path_length'] = nx.average_shortest_path_length(G)
-    else:
-        largest_scc = max(nx.strongly_connected_components(G), key=len)
-        scc_subgraph = G.subgraph(largest_scc)
-        analysis['avg_shortest_path_length_largest_scc'] = nx.average_shortest_path_length(scc_subgraph)
+    with span("path lengths"):
+        if analysis['is_strongly_connected']:
+            analysis['avg_shortest_path_length'] = nx.average_shortest_path_length(G)
+        else:
+            largest_scc = max(nx.strongly_connected_components(G), key=len)
+            scc_subgraph = G.subgraph(largest_scc)
+            analysis['avg_shortest_path_length_largest_scc'] = nx.average_shortest_path_length(scc_subgraph)
 
     # Community detection
-    partition = community.best_partition(G.to_undirected())
-    modularity = community.modularity(partition, G.to_undirected())
+    with span("communities"):
+        partition = community.best_partition(G.to_undirected())
+        modularity = community.modularity(partition, G.to_undirected())
     analysis['num_communities'] = len(set(partition.values()))
     analysis['modularity'] = modularity
 
@@ -1,23 +1,37 @@
 import streamlit as st
 import networkx as nx
 import plotly.graph_objects as go
-import io
 import os
 import csv
-import zipfile
+import uuid
 from .data_generator import DataGenerator
-from .performance_utils import measure_performance, format_performance_metrics
+from .csv_export import csv_zip_bytes
+from .performance_utils import measure_performance
+from .span_tracer import span, traced, show_phase_breakdown
 from .growth_rate_analysis import show_growth_rate_analysis
+from .centrality_service import get_centrality_cache
 
 
 @measure_performance
-def generate_graph(total_nodes):
-    generator = DataGenerator(total_nodes)
+def generate_graph(total_nodes, columnar=False):
+    generator = DataGenerator(total_nodes, columnar=columnar)
     generator.generate_data()
-    return generator.get_data(), generator.get_graph()
+    # Each generated graph is a new version for the centrality cache
+    generator.G.graph['fingerprint'] = uuid.uuid4().hex
+    return generator.get_data(), generator
 
+
+def session_graph():
+    """The generated graph, built from the generator's columnar data the first time a page needs it."""
+    if 'graph' not in st.session_state and 'generator' in st.session_state:
+        with span("build networkx graph"):
+            st.session_state['graph'] = st.session_state['generator'].get_graph()
+    return st.session_state.get('graph')
+
+@traced("build figure")
 def plot_graph(G):
-    pos = nx.spring_layout(G)
+    with span("spring layout"):
+        pos = nx.spring_layout(G)
     edge_x, edge_y = [], []
     for edge in G.edges():
         x0, y0 = pos[edge[0]]
@@ -98,24 +112,6 @@ def save_to_csv(data, output_dir='output'):
                 for item in items:
                     writer.writerow(item)
 
-def generate_csv_files(data):
-    csv_files = {}
-    for key, items in data.items():
-        if key == 'business_group':
-            items = [items]  # Convert single dict to list for consistent processing
-
-        output = io.StringIO()
-        if items:
-            fieldnames = items[0].keys()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            for item in items:
-                writer.writerow(item)
-
-        csv_files[f"{key}.csv"] = output.getvalue()
-
-    return csv_files
-
 def show():
     st.title("Graph Generation and Analysis")
 
@@ -123,79 +119,77 @@ def show():
 
     with tab1:
         total_nodes = st.slider("Total number of nodes", min_value=26, max_value=1000000, value=1000)
+        columnar = st.checkbox("Columnar generation (NumPy arrays)", value=True,
+                               help="Stores module and part features as arrays and builds the NetworkX graph only "
+                                    "when an analysis page needs it")
 
         if st.button("Generate Graph"):
-            with st.spinner("Generating graph..."):
-                result = generate_graph(total_nodes)
-                data, G = result[0], result[1]
-                performance_metrics = result[2]
-
-            st.session_state['data'] = data
-            st.session_state['graph'] = G
-
-            st.success(f"Graph generated with {total_nodes} nodes.")
-
-            col1, col2 = st.columns([3, 1])
-
-            if total_nodes <= 10000:
-                with col1:
-                    st.subheader("Generated Graph Visualization")
-                    fig = plot_graph(G)
-                    st.plotly_chart(fig, use_container_width=True)
-
-                with col2:
-                    st.subheader("Performance Metrics")
-                    st.text(format_performance_metrics(performance_metrics))
-
-                    with st.expander("Metrics Explanation"):
-                        st.info(get_metrics_explanation())
-
-                    csv_files = generate_csv_files(data)
-
-                    # Create a zip file containing all CSV files
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                        for filename, content in csv_files.items():
-                            zip_file.writestr(filename, content)
-
-                    # Offer the zip file for download
-                    st.download_button(
-                        label="Download CSV files",
-                        data=zip_buffer.getvalue(),
-                        file_name="graph_data.zip",
-                        mime="application/zip"
-                    )
-
-            else:
-                st.subheader("Performance Metrics")
-                st.text(format_performance_metrics(performance_metrics))
-
-                with st.expander("Metrics Explanation"):
-                    st.info(get_metrics_explanation())
-
-                csv_files = generate_csv_files(data)
-
-                # Create a zip file containing all CSV files
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for filename, content in csv_files.items():
-                        zip_file.writestr(filename, content)
-
-                # Offer the zip file for download
-                st.download_button(
-                    label="Download CSV files",
-                    data=zip_buffer.getvalue(),
-                    file_name="graph_data.zip",
-                    mime="application/zip"
-                )
+            with span("Graph Generation") as root:
+                with st.spinner("Generating graph..."):
+                    result = generate_graph(total_nodes, columnar=columnar)
+                    data, generator = result[0], result[1]
+                    performance_metrics = result[2]
+
+                st.session_state['data'] = data
+                st.session_state['generator'] = generator
+                st.session_state.pop('graph', None)
+                get_centrality_cache().invalidate()
+
+                st.success(f"Graph generated with {total_nodes} nodes.")
+
+                col1, col2 = st.columns([3, 1])
+
+                if total_nodes <= 10000:
+                    with col1:
+                        st.subheader("Generated Graph Visualization")
+                        fig = plot_graph(session_graph())
+                        with span("streamlit render"):
+                            st.plotly_chart(fig, use_container_width=True)
+
+                    breakdown = col2.container()
+                else:
+                    breakdown = st.container()
+
+            show_phase_breakdown(root, breakdown, performance_metrics)
+
+            with breakdown.expander("Metrics Explanation"):
+                st.info(get_metrics_explanation())
+
+        if 'generator' in st.session_state:
+            generator = st.session_state['generator']
+            # Deferred: the archive is written on the first download of a graph version and reused after that
+            st.download_button(
+                label="Download CSV files",
+                data=lambda: csv_zip_bytes(generator),
+                file_name="graph_data.zip",
+                mime="application/zip",
+                on_click='ignore'
+            )
+            show_demand_update(generator)
 
     with tab2:
         show_growth_rate_analysis()
 
+def show_demand_update(generator):
+    with st.expander("Update Offering Demand"):
+        offerings = {po['id']: po for po in generator.product_offerings}
+        offering_id = st.selectbox("Product offering", list(offerings),
+                                   format_func=lambda node: f"{node} ({offerings[node]['name']})")
+        demand = st.number_input("New demand", min_value=0, value=int(offerings[offering_id]['demand']))
+        if st.button("Apply demand change"):
+            with span("demand update"):
+                updated = generator.update_demand({offering_id: demand})
+            st.success(f"Demand of {len(updated)} nodes updated from the offering's bill of materials.")
+
 def get_metrics_explanation():
     return """
     Explanation of metrics:
-    - Execution Time: The total time taken to complete the operation, measured in seconds.
-    - Memory Used: The additional memory consumed during the operation, measured in megabytes (MB).
-    - Peak Memory: The maximum amount of memory used at any point during the operation, measured in megabytes (MB).
-    """
\ No newline at end of file
+    - Performance Breakdown: Time spent in each phase of the Generate click (data generation, graph build, figure
+      and render). Total includes nested phases; Self excludes them.
+    - Execution Time: The time taken to generate the data, measured in seconds.
+    - Memory Used: The change in process memory (RSS) over generation, measured in megabytes (MB).
+    - Peak Memory: In 'sampled' mode, the highest process memory seen above the starting point; in 'tracemalloc'
+      mode, the maximum memory allocated by Python objects during generation. Measured in megabytes (MB).
+    - The CSV export is not included: it is written the first time "Download CSV files" is clicked and reused
+      until the graph or its demand changes.
+    """
@@ -1,7 +1,9 @@
 import streamlit as st
 import networkx as nx
 import plotly.graph_objects as go
-from .performance_utils import measure_performance, format_performance_metrics, get_metrics_explanation
+from .performance_utils import measure_performance, get_metrics_explanation
+from .graph_generation import session_graph
+from .span_tracer import span, traced, show_phase_breakdown
 
 
 @measure_performance
@@ -18,12 +20,14 @@ def find_shortest_path(G, start_node, end_node):
         return None
 
 
+@traced("build figure")
 def visualize_path(G, path):
     if not path:
         return None
 
     subgraph = G.subgraph(path)
-    pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
+    with span("spring layout"):
+        pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
 
     edge_x, edge_y = [], []
     for edge in subgraph.edges():
@@ -64,12 +68,11 @@ def visualize_path(G, path):
 def show():
     st.title("Shortest Path Query")
 
-    if 'graph' not in st.session_state:
+    G = session_graph()
+    if G is None:
         st.warning("Please generate a graph first.")
         return
 
-    G = st.session_state['graph']
-
     # Get the list of nodes
     node_list = list(G.nodes())
 
@@ -87,14 +90,16 @@ def show():
         st.write(f"Selected end node: {end_node}")
 
     if st.button("Find Shortest Path"):
-        path, performance_metrics = find_shortest_path(G, start_node, end_node)
-        if path:
-            st.success(f"Shortest path found: {' -> '.join(path)}")
-            fig = visualize_path(G, path)
-            if fig:
-                st.plotly_chart(fig)
+        with span("Shortest Path Query") as root:
+            path, performance_metrics = find_shortest_path(G, start_node, end_node)
+            if path:
+                st.success(f"Shortest path found: {' -> '.join(path)}")
+                fig = visualize_path(G, path)
+                if fig:
+                    with span("streamlit render"):
+                        st.plotly_chart(fig)
 
-            st.subheader("Performance Metrics")
-            st.text(format_performance_metrics(performance_metrics))
+        if path:
+            show_phase_breakdown(root, metrics=performance_metrics)
 
     st.info(get_metrics_explanation())
\ No newline at end of file
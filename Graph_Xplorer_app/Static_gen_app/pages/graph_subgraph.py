@@ -1,7 +1,9 @@
 import streamlit as st
 import networkx as nx
 import plotly.graph_objects as go
-from .performance_utils import measure_performance, format_performance_metrics, get_metrics_explanation
+from .performance_utils import measure_performance, get_metrics_explanation
+from .graph_generation import session_graph
+from .span_tracer import span, show_phase_breakdown
 
 @measure_performance
 def query_subgraph(G, node_id, levels=2):
@@ -21,7 +23,8 @@ def query_subgraph(G, node_id, levels=2):
 
     subgraph = G.subgraph(subgraph_nodes)
 
-    pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
+    with span("spring layout"):
+        pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
 
     edge_x, edge_y = [], []
     for edge in subgraph.edges():
@@ -73,12 +76,11 @@ def query_subgraph(G, node_id, levels=2):
 def show():
     st.title("Subgraph Query")
 
-    if 'graph' not in st.session_state:
+    G = session_graph()
+    if G is None:
         st.warning("Please generate a graph first.")
         return
 
-    G = st.session_state['graph']
-
     # Get the list of nodes
     node_list = list(G.nodes())
 
@@ -89,12 +91,14 @@ def show():
     levels = st.slider("Select the number of levels to explore:", min_value=1, max_value=5, value=2)
 
     if st.button("Query Subgraph"):
-        fig, performance_metrics = query_subgraph(G, selected_node, levels)
-        if fig:
-            st.plotly_chart(fig)
+        with span("Subgraph Query") as root:
+            fig, performance_metrics = query_subgraph(G, selected_node, levels)
+            if fig:
+                with span("streamlit render"):
+                    st.plotly_chart(fig)
 
-            st.subheader("Performance Metrics")
-            st.text(format_performance_metrics(performance_metrics))
+        if fig:
+            show_phase_breakdown(root, metrics=performance_metrics)
 
             st.info(get_metrics_explanation())
 
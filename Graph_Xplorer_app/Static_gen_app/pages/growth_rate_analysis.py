@@ -8,7 +8,7 @@ def analyze_growth_rate(max_nodes, step):
     times = []
 
     for n in nodes:
-        @measure_performance
+        @measure_performance(mode='timing')
         def generate_graph(total_nodes):
             generator = DataGenerator(total_nodes)
             generator.generate_data()
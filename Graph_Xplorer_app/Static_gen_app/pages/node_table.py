@@ -0,0 +1,86 @@
+from collections.abc import Sequence
+import numpy as np
+
+
+class NodeTable(Sequence):
+    """Nodes of one kind stored column-wise: one NumPy array per numeric feature, with IDs and names derived
+    from the row index. Indexing a row builds its dict on access, in the same form as the dict-based generator.
+    """
+
+    def __init__(self, id_prefix, name_prefix, columns):
+        self.id_prefix = id_prefix
+        self.name_prefix = name_prefix
+        self.columns = columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def node_id(self, i):
+        return f'{self.id_prefix}_{i + 1:03d}'
+
+    def name(self, i):
+        return f'{self.name_prefix}_{i + 1}'
+
+    def ids(self, rows=None):
+        """IDs of the given row indices, or of every row."""
+        rows = range(1, len(self) + 1) if rows is None else (np.asarray(rows) + 1).tolist()
+        return [f'{self.id_prefix}_{i:03d}' for i in rows]
+
+    def names(self, rows=None):
+        rows = range(1, len(self) + 1) if rows is None else (np.asarray(rows) + 1).tolist()
+        return [f'{self.name_prefix}_{i}' for i in rows]
+
+    def row(self, i):
+        data = {'id': self.node_id(i), 'name': self.name(i)}
+        data.update((key, column[i].item()) for key, column in self.columns.items())
+        return data
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.row(i)
+
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+
+class EdgeTable(Sequence):
+    """Edges stored as parallel arrays: source and target node positions plus one array per edge feature.
+    `node_id` maps a position back to its node ID, and `node_ids` an array of positions to a list of IDs;
+    indexing a row builds its dict in EDGE_FEATURES order."""
+
+    def __init__(self, sources, targets, columns, node_id, node_ids=None):
+        self.sources = sources
+        self.targets = targets
+        self.columns = columns
+        self.node_id = node_id
+        self._node_ids = node_ids
+
+    def ids(self, positions):
+        if self._node_ids is not None:
+            return self._node_ids(positions)
+        return [self.node_id(p) for p in np.asarray(positions).tolist()]
+
+    def __len__(self):
+        return len(self.sources)
+
+    def row(self, i):
+        data = {'source_id': self.node_id(int(self.sources[i])), 'target_id': self.node_id(int(self.targets[i]))}
+        data.update((key, column[i].item()) for key, column in self.columns.items())
+        return data
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.row(i)
+
+    def nbytes(self):
+        return self.sources.nbytes + self.targets.nbytes + sum(column.nbytes for column in self.columns.values())
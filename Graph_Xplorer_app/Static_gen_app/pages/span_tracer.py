@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+import streamlit as st
+
+# Finished top-level spans kept for export; older ones are dropped
+MAX_ROOT_SPANS = 256
+
+
+class Span:
+    """One timed phase. Children are the spans opened on the same thread while this one was open."""
+
+    __slots__ = ('name', 'args', 'thread_id', 'start_ns', 'end_ns', 'children')
+
+    def __init__(self, name, args=None):
+        self.name = name
+        self.args = args or {}
+        self.thread_id = threading.get_ident()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.children = []
+
+    @property
+    def duration(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def walk(self, depth=0):
+        yield self, depth
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+class Tracer:
+    """Collects nested spans with one stack per thread."""
+
+    def __init__(self, max_root_spans=MAX_ROOT_SPANS):
+        self._local = threading.local()
+        self._roots = deque(maxlen=max_root_spans)
+        self._lock = threading.Lock()
+        self.epoch_ns = time.perf_counter_ns()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **args):
+        stack = self._stack()
+        current = Span(name, args)
+        if stack:
+            stack[-1].children.append(current)
+        stack.append(current)
+        try:
+            yield current
+        finally:
+            current.end_ns = time.perf_counter_ns()
+            stack.pop()
+            if not stack:
+                with self._lock:
+                    self._roots.append(current)
+
+    def traced(self, name=None):
+        """Decorator form of `span`, named after the function unless `name` is given."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def roots(self):
+        with self._lock:
+            return list(self._roots)
+
+    def clear(self):
+        with self._lock:
+            self._roots.clear()
+
+    def chrome_trace(self, roots=None):
+        """Trace Event Format dict, loadable in chrome://tracing and ui.perfetto.dev."""
+        events = []
+        pid = os.getpid()
+        for root in (self.roots() if roots is None else roots):
+            for current, _ in root.walk():
+                end_ns = current.end_ns if current.end_ns is not None else time.perf_counter_ns()
+                events.append({
+                    'name': current.name,
+                    'cat': 'graph_gen',
+                    'ph': 'X',
+                    'ts': (current.start_ns - self.epoch_ns) / 1000,
+                    'dur': (end_ns - current.start_ns) / 1000,
+                    'pid': pid,
+                    'tid': current.thread_id,
+                    'args': {key: str(value) for key, value in current.args.items()},
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path, roots=None):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(roots), f)
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **args):
+    return _tracer.span(name, **args)
+
+
+def traced(name=None):
+    return _tracer.traced(name)
+
+
+def phase_breakdown(root):
+    """Per-phase table of a span tree. Repeated calls of a phase under the same parent are summed; self time
+    is the part of a phase not covered by its child phases."""
+    rows = {}
+    paths = {id(root): (root.name,)}
+    for current, depth in root.walk():
+        path = paths[id(current)]
+        for child in current.children:
+            paths[id(child)] = path + (child.name,)
+        child_time = sum(child.duration for child in current.children)
+        row = rows.setdefault(path, {'Phase': '    ' * depth + current.name, 'Calls': 0, 'Total (s)': 0.0,
+                                     'Self (s)': 0.0})
+        row['Calls'] += 1
+        row['Total (s)'] += current.duration
+        row['Self (s)'] += current.duration - child_time
+
+    table = pd.DataFrame(list(rows.values()))
+    table['% of Total'] = 100 * table['Total (s)'] / max(root.duration, 1e-12)
+    return table
+
+
+def show_phase_breakdown(root, container=st, metrics=None):
+    """Per-phase table plus a Chrome trace download for one finished span tree. `metrics` from
+    measure_performance adds its memory figures below the table."""
+    container.subheader("Performance Breakdown")
+    container.dataframe(phase_breakdown(root).style.format({'Total (s)': '{:.4f}', 'Self (s)': '{:.4f}',
+                                                            '% of Total': '{:.1f}'}),
+                        use_container_width=True, hide_index=True)
+    if metrics and metrics.get('peak_memory') is not None:
+        container.caption(f"Memory Used: {metrics['memory_used']:.2f} MB, Peak Memory: {metrics['peak_memory']:.2f} MB "
+                          f"({metrics['mode']} mode)")
+    container.download_button("Download Chrome trace", data=json.dumps(_tracer.chrome_trace([root])),
+                              file_name=f"{root.name.lower().replace(' ', '_')}_trace.json",
+                              mime="application/json")
@@ -0,0 +1,133 @@
+import numpy as np
+import networkx as nx
+from typing import NamedTuple
+from constants import BUSINESS_GROUP, PRODUCT_FAMILIES, PRODUCT_OFFERINGS
+from node_index import GROUP_CODES, NodeRegistry
+
+OFFERING_IDS = [offering['Offering_ID'] for offering in PRODUCT_OFFERINGS]
+BASE_NODE_COUNT = 1 + len(PRODUCT_FAMILIES) + len(PRODUCT_OFFERINGS)
+PART_ATTACH_PROBABILITY = 0.7
+
+
+class GraphStructure(NamedTuple):
+    """Array form of a generated graph. Modules and parts are stored in counter order."""
+    module_offering: np.ndarray  # offering index (into PRODUCT_OFFERINGS) per module
+    part_offering: np.ndarray  # offering index per part
+    part_make: np.ndarray  # True for make parts, False for purchase parts
+    part_parent: np.ndarray  # module index per part, -1 when attached to its offering
+
+
+def density_array(density_factors):
+    return np.array([density_factors.get(offering_id, 0.5) for offering_id in OFFERING_IDS])
+
+
+def _module_counts(rng, density, offerings):
+    # Vectorized poisson_module_generation(mu=int(3 * density_factor))
+    mu = (3 * density[offerings]).astype(np.int64)
+    return np.maximum(1, rng.poisson(mu))
+
+
+def _part_counts(rng, density, offerings):
+    # Vectorized gaussian_part_generation(mean=5, stddev=2)
+    return np.maximum(1, rng.normal(5, 2, size=len(offerings)).astype(np.int64))
+
+
+def _draw_phase(rng, density, target, draw_counts, expected_count):
+    """Draw offering picks and density coin flips in chunks until `target` nodes have been generated.
+
+    Like the sequential loop, the trial that crosses the target still contributes all of its nodes.
+    Returns the offering index of every generated node.
+    """
+    offerings, counts = [], []
+    generated = 0
+    expected_per_trial = max(float(np.mean(density)) * expected_count, 1e-3)
+    while generated < target:
+        chunk = int((target - generated) / expected_per_trial * 1.1) + 64
+        picks = rng.integers(0, len(density), size=chunk)
+        picks = picks[rng.random(chunk) < density[picks]]
+        sizes = draw_counts(rng, density, picks)
+        totals = generated + np.cumsum(sizes)
+        stop = int(np.searchsorted(totals, target))
+        if stop < len(picks):
+            picks, sizes = picks[:stop + 1], sizes[:stop + 1]
+        offerings.append(picks)
+        counts.append(sizes)
+        if len(sizes):
+            generated += int(sizes.sum())
+    if not offerings:
+        return np.empty(0, dtype=np.int64)
+    return np.repeat(np.concatenate(offerings), np.concatenate(counts))
+
+
+def draw_structure(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    density = density_array(density_factors)
+
+    remaining_nodes = total_nodes - BASE_NODE_COUNT
+    modules_count = int(remaining_nodes * module_to_part_ratio)
+
+    module_offering = _draw_phase(rng, density, modules_count, _module_counts,
+                                  expected_count=max(1.0, float(np.mean((3 * density).astype(np.int64)))))
+    parts_target = remaining_nodes - len(module_offering)
+    part_offering = _draw_phase(rng, density, parts_target, _part_counts, expected_count=5.0)
+
+    num_parts = len(part_offering)
+    part_make = rng.random(num_parts) < 0.5
+    if len(module_offering):
+        part_parent = rng.integers(0, len(module_offering), size=num_parts)
+        part_parent[rng.random(num_parts) >= PART_ATTACH_PROBABILITY] = -1
+    else:
+        part_parent = np.full(num_parts, -1, dtype=np.int64)
+
+    return GraphStructure(module_offering, part_offering, part_make, part_parent)
+
+
+def module_ids(structure):
+    return [f'M_{OFFERING_IDS[o]}_{i:04d}' for i, o in enumerate(structure.module_offering.tolist())]
+
+
+def part_ids(structure):
+    return [f'P_{OFFERING_IDS[o]}_{i:04d}' for i, o in enumerate(structure.part_offering.tolist())]
+
+
+def build_networkx_graph(structure, node_ids=None):
+    """nx.Graph of a GraphStructure. node_ids, if given, is the (module IDs, part IDs, part parent IDs) lists
+    already formatted, as sharded generation does in its workers."""
+    if node_ids is None:
+        modules = module_ids(structure)
+        parts = part_ids(structure)
+        parents = [modules[p] if p >= 0 else OFFERING_IDS[o]
+                   for p, o in zip(structure.part_parent.tolist(), structure.part_offering.tolist())]
+    else:
+        modules, parts, parents = node_ids
+
+    G = nx.Graph()
+    G.add_node('BG001', label=BUSINESS_GROUP['BG001'], group='business_group')
+    G.add_nodes_from((family['Family_ID'], {'label': family['Family_Name'], 'group': 'family'})
+                     for family in PRODUCT_FAMILIES)
+    G.add_edges_from(('BG001', family['Family_ID']) for family in PRODUCT_FAMILIES)
+    G.add_nodes_from((offering['Offering_ID'], {'label': offering['Offering_Name'], 'group': 'offering'})
+                     for offering in PRODUCT_OFFERINGS)
+    G.add_edges_from((offering['Family_ID'], offering['Offering_ID']) for offering in PRODUCT_OFFERINGS)
+
+    G.add_nodes_from((module_id, {'label': f'Module {i}', 'group': 'module'}) for i, module_id in enumerate(modules))
+    G.add_edges_from(zip((OFFERING_IDS[o] for o in structure.module_offering.tolist()), modules))
+
+    make = structure.part_make.tolist()
+    G.add_nodes_from(
+        (part_id, {'label': f'Make Part {i}' if is_make else f'Purchase Part {i}',
+                   'group': 'make' if is_make else 'purchase'})
+        for i, (part_id, is_make) in enumerate(zip(parts, make))
+    )
+    G.add_edges_from(zip(parents, parts))
+
+    # Nodes were added as the base nodes, the modules and then the parts, so the group codes follow the same layout
+    codes = np.concatenate([
+        [GROUP_CODES['business_group']],
+        np.full(len(PRODUCT_FAMILIES), GROUP_CODES['family']),
+        np.full(len(PRODUCT_OFFERINGS), GROUP_CODES['offering']),
+        np.full(len(modules), GROUP_CODES['module']),
+        np.where(structure.part_make, GROUP_CODES['make'], GROUP_CODES['purchase']),
+    ]).astype(np.uint8)
+    G.graph['group_index'] = NodeRegistry(codes, list(G))
+    return G
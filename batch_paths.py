@@ -0,0 +1,97 @@
+import numpy as np
+import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+from path_index import get_path_index
+
+# Sources searched together, one bit of a uint64 lane each
+LANES = 64
+UNREACHABLE = -1
+
+
+def multi_source_bfs(indptr, indices, sources, targets):
+    """Hop distances from up to 64 source positions to every target position, (len(sources), len(targets)).
+
+    All sources advance together: each node holds a 64-bit mask of the sources that have reached it, and one
+    level of the search is a gather of the frontier masks over the CSR arrays plus an OR-reduction per node.
+    """
+    n = len(indptr) - 1
+    indptr = np.asarray(indptr, dtype=np.int64)
+    dist = np.full((len(sources), len(targets)), UNREACHABLE, dtype=np.int32)
+    if not len(sources) or not len(targets):
+        return dist
+
+    bits = np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64))
+    frontier = np.zeros(n, dtype=np.uint64)
+    np.bitwise_or.at(frontier, np.asarray(sources, dtype=np.int64), bits)
+    visited = frontier.copy()
+    targets = np.asarray(targets, dtype=np.int64)
+    has_neighbors = indptr[1:] > indptr[:-1]
+    row_starts = indptr[:-1][has_neighbors]
+    all_reached = np.bitwise_or.reduce(bits)
+
+    level = 0
+    while True:
+        reached = frontier[targets]
+        hit = reached != 0
+        if hit.any():
+            # Expand each target's newly set bits into (source, target) pairs
+            lanes = np.unpackbits(reached[hit].view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+            target_rows, source_rows = np.nonzero(lanes[:, :len(sources)])
+            dist[source_rows, np.flatnonzero(hit)[target_rows]] = level
+        if not frontier.any() or np.all(visited[targets] == all_reached):
+            break
+
+        gathered = frontier[indices]
+        next_frontier = np.zeros(n, dtype=np.uint64)
+        if len(gathered):
+            next_frontier[has_neighbors] = np.bitwise_or.reduceat(gathered, row_starts)
+        frontier = next_frontier & ~visited
+        visited |= frontier
+        level += 1
+
+    return dist
+
+
+_worker_arrays = None
+
+
+def _init_worker(indptr, indices, targets):
+    # The graph arrays are sent once per worker process instead of once per batch
+    global _worker_arrays
+    _worker_arrays = (indptr, indices, targets)
+
+
+def _bfs_batch(sources):
+    indptr, indices, targets = _worker_arrays
+    return multi_source_bfs(indptr, indices, sources, targets)
+
+
+def distance_matrix(G, sources, targets, return_paths=False, workers=1):
+    """Hop distances between every source and target node, with UNREACHABLE (-1) for pairs without a path.
+
+    Sources are searched 64 at a time; with workers > 1 the batches are spread over a process pool. With
+    return_paths, also returns {(source, target): [nodes...]} for every reachable pair, taken from the path index.
+    """
+    index = get_path_index(G)
+    source_positions = [index.position(node) for node in sources]
+    target_positions = np.array([index.position(node) for node in targets], dtype=np.int64)
+
+    batches = [source_positions[start:start + LANES] for start in range(0, len(source_positions), LANES)]
+    if workers <= 1 or len(batches) <= 1:
+        blocks = [multi_source_bfs(index.indptr, index.indices, batch, target_positions) for batch in batches]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_init_worker,
+                                 initargs=(index.indptr, index.indices, target_positions)) as executor:
+            blocks = list(executor.map(_bfs_batch, batches))
+    dist = np.concatenate(blocks) if blocks else np.empty((0, len(target_positions)), dtype=np.int32)
+
+    if not return_paths:
+        return dist
+    paths = {}
+    for i, j in zip(*np.nonzero(dist != UNREACHABLE)):
+        source, target = sources[i], targets[j]
+        try:
+            paths[(source, target)] = index.shortest_path(source, target)
+        except nx.NetworkXNoPath:
+            pass
+    return dist, paths
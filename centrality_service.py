@@ -0,0 +1,96 @@
+from collections import OrderedDict
+import networkx as nx
+from compact_graph import as_networkx
+from graph_cache import graph_fingerprint
+from span_tracer import span
+from approx_betweenness import betweenness_estimate
+from tree_centrality import TREE_MEASURES, get_tree_centrality
+
+DEFAULT_MEMORY_BUDGET = 128 * 1024 * 1024
+# Rough cost of one node -> float entry of a result dict: hash table slot plus the float object
+_BYTES_PER_ENTRY = 100
+
+MEASURES = {
+    'Degree Centrality': nx.degree_centrality,
+    # Exact up to EXACT_MAX_NODES, pivot-sampled above; see betweenness() for the error estimate
+    'Betweenness Centrality': lambda G: betweenness_estimate(G, seed=0)[0],
+    'Closeness Centrality': nx.closeness_centrality,
+    'Eccentricity': nx.eccentricity,
+}
+
+
+def _result_bytes(result):
+    # Results are node -> value dicts, or tuples holding several of them
+    dicts = result if isinstance(result, tuple) else (result,)
+    return _BYTES_PER_ENTRY * sum(len(part) for part in dicts if isinstance(part, dict))
+
+
+class CentralityCache:
+    """Centrality results keyed on (graph version, measure), evicted LRU under a memory budget."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, measure, compute):
+        key = (version, measure)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        with span(f"compute {measure}"):
+            result = compute()
+        self._entries[key] = result
+        self._evict()
+        return result
+
+    def invalidate(self, version=None):
+        """Drop the results of one graph version, or of every version."""
+        for key in [key for key in self._entries if version is None or key[0] == version]:
+            del self._entries[key]
+
+    def nbytes(self):
+        return sum(_result_bytes(result) for result in self._entries.values())
+
+    def _evict(self):
+        # The most recent result always stays, even when it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes() > self.memory_budget:
+            self._entries.popitem(last=False)
+
+
+_centrality_cache = None
+
+
+def get_centrality_cache():
+    global _centrality_cache
+    if _centrality_cache is None:
+        _centrality_cache = CentralityCache()
+    return _centrality_cache
+
+
+def is_tree(G):
+    """Whether G is an undirected tree or forest, whose centralities are exact in linear time."""
+    return get_tree_centrality(G) is not None
+
+
+def betweenness(G, k=None, epsilon=None, workers=1):
+    """(values, std_errors, pivots) from approx_betweenness.betweenness_estimate, cached per graph version and
+    sampling setting. The pivot sample is seeded so a cached and a recomputed estimate agree."""
+    return get_centrality_cache().get(graph_fingerprint(G), ('Betweenness Centrality', k, epsilon),
+                                      lambda: betweenness_estimate(G, k, epsilon, workers=workers, seed=0))
+
+
+def _compute(G, measure):
+    engine = get_tree_centrality(G) if measure in TREE_MEASURES else None
+    if engine is not None:
+        return engine.values(measure)
+    return MEASURES[measure](as_networkx(G))
+
+
+def centrality(G, measure):
+    """{node: value} for one of MEASURES, computed once per graph version; exact in O(N) on trees."""
+    return get_centrality_cache().get(graph_fingerprint(G), measure, lambda: _compute(G, measure))
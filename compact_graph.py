@@ -0,0 +1,236 @@
+import numpy as np
+import networkx as nx
+from constants import BUSINESS_GROUP, PRODUCT_FAMILIES, PRODUCT_OFFERINGS
+from batch_generation import OFFERING_IDS, BASE_NODE_COUNT
+from node_index import GROUPS, GROUP_CODES, NodeRegistry, get_group_index
+
+BASE_IDS = (['BG001'] + [family['Family_ID'] for family in PRODUCT_FAMILIES] +
+            [offering['Offering_ID'] for offering in PRODUCT_OFFERINGS])
+BASE_LABELS = (list(BUSINESS_GROUP.values()) + [family['Family_Name'] for family in PRODUCT_FAMILIES] +
+               [offering['Offering_Name'] for offering in PRODUCT_OFFERINGS])
+BASE_GROUPS = ['business_group'] + ['family'] * len(PRODUCT_FAMILIES) + ['offering'] * len(PRODUCT_OFFERINGS)
+BASE_POSITIONS = {node: i for i, node in enumerate(BASE_IDS)}
+OFFERING_POSITIONS = {offering_id: i for i, offering_id in enumerate(OFFERING_IDS)}
+FIRST_OFFERING = 1 + len(PRODUCT_FAMILIES)
+
+
+class CompactNodeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return self._graph.number_of_nodes()
+
+    def __iter__(self):
+        return (self._graph.node_id(i) for i in range(self._graph.number_of_nodes()))
+
+    def __contains__(self, node):
+        return self._graph.position(node) is not None
+
+    def __getitem__(self, node):
+        i = self._graph.position(node)
+        if i is None:
+            raise KeyError(node)
+        return {'label': self._graph.node_label(i), 'group': GROUPS[self._graph.group_codes[i]]}
+
+    def __call__(self, data=False):
+        if not data:
+            return iter(self)
+        return ((self._graph.node_id(i), {'label': self._graph.node_label(i), 'group': GROUPS[code]})
+                for i, code in enumerate(self._graph.group_codes.tolist()))
+
+
+class CompactGraph:
+    """Undirected generated graph stored as int32 CSR arrays plus a uint8 group code per node.
+
+    Nodes are laid out as the base nodes (business group, families, offerings), then modules, then parts, each
+    in counter order, so node IDs and labels are derived from a position instead of being stored. Covers the
+    parts of the nx.Graph interface the pages use; `to_networkx` converts for any other algorithm.
+    """
+
+    def __init__(self, indptr, indices, group_codes, module_offering, part_offering):
+        self.indptr = indptr
+        self.indices = indices
+        self.group_codes = group_codes
+        self.module_offering = module_offering
+        self.part_offering = part_offering
+        self.num_modules = len(module_offering)
+        self.first_part = BASE_NODE_COUNT + self.num_modules
+        self.graph = {'group_index': NodeRegistry(group_codes, graph=self)}
+        self.nodes = CompactNodeView(self)
+        self._nx_graph = None
+
+    @classmethod
+    def from_structure(cls, structure, module_parents=None, part_parents=None):
+        """Graph of a GraphStructure. Parent positions of the modules and parts are derived from it unless given,
+        as sharded generation does with the blocks its workers built."""
+        num_modules = len(structure.module_offering)
+        num_parts = len(structure.part_offering)
+        first_part = BASE_NODE_COUNT + num_modules
+        num_nodes = first_part + num_parts
+
+        group_codes = np.empty(num_nodes, dtype=np.uint8)
+        group_codes[:BASE_NODE_COUNT] = [GROUP_CODES[group] for group in BASE_GROUPS]
+        group_codes[BASE_NODE_COUNT:first_part] = GROUP_CODES['module']
+        group_codes[first_part:] = np.where(structure.part_make, GROUP_CODES['make'], GROUP_CODES['purchase'])
+
+        if module_parents is None:
+            module_parents = FIRST_OFFERING + structure.module_offering
+        if part_parents is None:
+            part_parents = np.where(structure.part_parent >= 0, BASE_NODE_COUNT + structure.part_parent,
+                                    FIRST_OFFERING + structure.part_offering)
+        family_positions = {family['Family_ID']: i + 1 for i, family in enumerate(PRODUCT_FAMILIES)}
+        sources = np.concatenate([
+            np.zeros(len(PRODUCT_FAMILIES), dtype=np.int64),
+            [family_positions[offering['Family_ID']] for offering in PRODUCT_OFFERINGS],
+            module_parents,
+            part_parents,
+        ]).astype(np.int32)
+        targets = np.arange(1, num_nodes, dtype=np.int32)
+
+        indptr, indices = _build_csr(sources, targets, num_nodes)
+        return cls(indptr, indices, group_codes, structure.module_offering.astype(np.uint8),
+                   structure.part_offering.astype(np.uint8))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_nx_graph'] = None
+        return state
+
+    # Node IDs and labels
+
+    def node_id(self, i):
+        if i < BASE_NODE_COUNT:
+            return BASE_IDS[i]
+        if i < self.first_part:
+            serial = i - BASE_NODE_COUNT
+            return f'M_{OFFERING_IDS[self.module_offering[serial]]}_{serial:04d}'
+        serial = i - self.first_part
+        return f'P_{OFFERING_IDS[self.part_offering[serial]]}_{serial:04d}'
+
+    def node_label(self, i):
+        if i < BASE_NODE_COUNT:
+            return BASE_LABELS[i]
+        if i < self.first_part:
+            return f'Module {i - BASE_NODE_COUNT}'
+        prefix = 'Make' if self.group_codes[i] == GROUP_CODES['make'] else 'Purchase'
+        return f'{prefix} Part {i - self.first_part}'
+
+    def position(self, node):
+        """Position of a node ID, or None when the graph has no such node."""
+        if not isinstance(node, str):
+            return None
+        if node in BASE_POSITIONS:
+            return BASE_POSITIONS[node]
+        kind, _, rest = node.partition('_')
+        offering_id, _, serial = rest.rpartition('_')
+        if not serial.isdigit() or offering_id not in OFFERING_POSITIONS:
+            return None
+        serial = int(serial)
+        if kind == 'M' and serial < self.num_modules:
+            i = BASE_NODE_COUNT + serial
+        elif kind == 'P' and serial < len(self.part_offering):
+            i = self.first_part + serial
+        else:
+            return None
+        return i if self.node_id(i) == node else None
+
+    def _require(self, node):
+        i = self.position(node)
+        if i is None:
+            raise nx.NetworkXError(f"The node {node} is not in the graph.")
+        return i
+
+    # NetworkX-compatible surface
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, node):
+        return node in self.nodes
+
+    def is_directed(self):
+        return False
+
+    def is_multigraph(self):
+        return False
+
+    def has_node(self, node):
+        return node in self.nodes
+
+    def number_of_nodes(self):
+        return len(self.group_codes)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def neighbor_positions(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbors(self, node):
+        return (self.node_id(j) for j in self.neighbor_positions(self._require(node)).tolist())
+
+    def degree_array(self):
+        return np.diff(self.indptr)
+
+    def degree(self, node=None):
+        if node is not None:
+            i = self._require(node)
+            return int(self.indptr[i + 1] - self.indptr[i])
+        return ((self.node_id(i), d) for i, d in enumerate(self.degree_array().tolist()))
+
+    def edges(self):
+        for i in range(self.number_of_nodes()):
+            u = self.node_id(i)
+            for j in self.neighbor_positions(i).tolist():
+                if j > i:
+                    yield u, self.node_id(j)
+
+    def adjacency(self):
+        for i in range(self.number_of_nodes()):
+            yield self.node_id(i), {self.node_id(j): {} for j in self.neighbor_positions(i).tolist()}
+
+    def subgraph(self, nodes):
+        """Small induced subgraph as a regular nx.Graph with the usual node attributes."""
+        positions = sorted({self._require(node) for node in nodes})
+        selected = set(positions)
+        H = nx.Graph()
+        H.add_nodes_from((self.node_id(i), {'label': self.node_label(i), 'group': GROUPS[self.group_codes[i]]})
+                         for i in positions)
+        H.add_edges_from((self.node_id(i), self.node_id(j)) for i in positions
+                         for j in self.neighbor_positions(i).tolist() if j > i and j in selected)
+        return H
+
+    def to_networkx(self):
+        """Full nx.Graph for algorithms the compact form does not implement; built once and kept."""
+        if self._nx_graph is None:
+            G = nx.Graph()
+            G.add_nodes_from(self.nodes(data=True))
+            G.add_edges_from(self.edges())
+            G.graph.update(self.graph)
+            self._nx_graph = G
+        return self._nx_graph
+
+
+def _build_csr(sources, targets, num_nodes):
+    rows = np.concatenate([sources, targets])
+    cols = np.concatenate([targets, sources])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    return indptr, cols[order].astype(np.int32)
+
+
+def as_networkx(G):
+    return G.to_networkx() if isinstance(G, CompactGraph) else G
+
+
+def group_codes(G):
+    """GROUP_CODES value of every node in G.nodes() order; len(GROUPS) for nodes without a known group."""
+    if isinstance(G, CompactGraph):
+        return G.group_codes
+    return get_group_index(G).codes
+
@@ -1,8 +1,14 @@
 import streamlit as st
 import matplotlib.pyplot as plt
-import networkx as nx
-import plotly.graph_objects as go
-from collections import Counter
+import heapq
+from node_index import get_group_index
+from offering_index import get_offering_index
+from graph_stats import graph_stats
+from layout_cache import cached_coords
+from graph_renderer import render_graph
+from span_tracer import span, show_phase_breakdown
+from centrality_service import MEASURES, centrality, betweenness, is_tree
+from approx_betweenness import EXACT_MAX_NODES, DEFAULT_PIVOTS
 
 
 def graph_analysis_page():
@@ -15,15 +21,16 @@ def graph_analysis_page():
     G = st.session_state['graph']
 
     st.subheader("Graph Statistics")
-    st.write(f"Number of nodes: {G.number_of_nodes()}")
-    st.write(f"Number of edges: {G.number_of_edges()}")
-    st.write(f"Average degree: {sum(dict(G.degree()).values()) / G.number_of_nodes():.2f}")
-    st.write(f"Density: {nx.density(G):.4f}")
-    st.write(f"Number of connected components: {nx.number_connected_components(G)}")
+    # One vectorized pass over the edge array, cached per graph version
+    stats = graph_stats(G)
+    st.write(f"Number of nodes: {stats.num_nodes}")
+    st.write(f"Number of edges: {stats.num_edges}")
+    st.write(f"Average degree: {stats.average_degree:.2f}")
+    st.write(f"Density: {stats.density:.4f}")
+    st.write(f"Number of connected components: {stats.num_components}")
 
     st.subheader("Node Type Distribution")
-    node_types = [data['group'] for _, data in G.nodes(data=True)]
-    type_counts = Counter(node_types)
+    type_counts = stats.group_counts
     fig, ax = plt.subplots()
     ax.bar(type_counts.keys(), type_counts.values())
     ax.set_xlabel("Node Type")
@@ -33,9 +40,9 @@ def graph_analysis_page():
     st.pyplot(fig)
 
     st.subheader("Degree Distribution")
-    degrees = [d for n, d in G.degree()]
+    counts, edges = stats.degree_histogram
     fig, ax = plt.subplots()
-    ax.hist(degrees, bins=20)
+    ax.stairs(counts, edges, fill=True)
     ax.set_xlabel("Degree")
     ax.set_ylabel("Frequency")
     ax.set_title("Degree Distribution")
@@ -43,8 +50,11 @@ def graph_analysis_page():
 
     st.subheader("Network Visualization")
     if st.button("Generate Network Visualization"):
-        fig = visualize_network(G)
-        st.plotly_chart(fig)
+        with span("Network Visualization") as root:
+            fig = visualize_network(G)
+            with span("streamlit render"):
+                st.plotly_chart(fig)
+        show_phase_breakdown(root)
 
     st.subheader("Centrality Analysis")
     st.write("""
@@ -58,23 +68,41 @@ def graph_analysis_page():
 
         - **Closeness Centrality**: Measures how close a node is to all other nodes in the network. 
           Nodes with high closeness centrality can quickly interact with all other nodes.
+
+        - **Eccentricity**: The largest number of hops from a node to any other node. 
+          Nodes with the lowest eccentricity form the center of the network.
         """)
 
-    centrality_option = st.selectbox(
-        "Choose a centrality measure",
-        ["Degree Centrality", "Betweenness Centrality", "Closeness Centrality"]
-    )
-    if centrality_option == "Degree Centrality":
-        centrality = nx.degree_centrality(G)
-    elif centrality_option == "Betweenness Centrality":
-        centrality = nx.betweenness_centrality(G)
+    centrality_option = st.selectbox("Choose a centrality measure", list(MEASURES))
+    # Computed once per generated graph; reruns and switching back to a measure hit the cache
+    errors = None
+    if centrality_option == 'Betweenness Centrality' and not is_tree(G):
+        num_nodes = G.number_of_nodes()
+        pivots = None
+        workers = 1
+        if num_nodes > EXACT_MAX_NODES:
+            st.write(f"Graphs above {EXACT_MAX_NODES:,} nodes get an estimate from shortest paths out of a random "
+                     "sample of pivot nodes. More pivots give a smaller error.")
+            col1, col2 = st.columns(2)
+            pivots = col1.number_input("Pivot nodes", min_value=2, max_value=num_nodes,
+                                       value=min(DEFAULT_PIVOTS, num_nodes))
+            workers = col2.number_input("Worker processes", min_value=1, max_value=32, value=1)
+        values, errors, pivots = betweenness(G, k=pivots, workers=workers)
+        if pivots >= num_nodes:
+            errors = None
+        else:
+            st.caption(f"Estimated from {pivots:,} of {num_nodes:,} pivot nodes; ± is about two standard errors, "
+                       "an approximate range rather than a guaranteed interval.")
     else:
-        centrality = nx.closeness_centrality(G)
+        values = centrality(G, centrality_option)
 
-    top_nodes = sorted(centrality.items(), key=lambda x: x[1], reverse=True)[:10]
+    # The most central nodes are those with the lowest eccentricity
+    select = heapq.nsmallest if centrality_option == 'Eccentricity' else heapq.nlargest
+    top_nodes = select(10, values.items(), key=lambda x: x[1])
     st.write(f"Top 10 nodes by {centrality_option}:")
     for node, value in top_nodes:
-        st.write(f"- {G.nodes[node]['label']}: {value:.4f}")
+        error = f" ± {2 * errors[node]:.4f}" if errors else ""
+        st.write(f"- {G.nodes[node]['label']}: {value:.4f}{error}")
 
     st.subheader("Product Offering Analysis")
     st.write("""
@@ -88,7 +116,12 @@ def graph_analysis_page():
           suggesting it may be more complex to design, manufacture, or maintain.
         """)
 
-    offerings = [node for node, data in G.nodes(data=True) if data['group'] == 'offering']
+    with st.expander("All Offerings Summary"):
+        summary = get_offering_index(G).summary()
+        summary.insert(1, 'Name', [G.nodes[offering]['label'] for offering in summary['Offering']])
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    offerings = list(get_group_index(G).nodes('offering'))
     selected_offering = st.selectbox("Select a Product Offering", offerings, format_func=lambda x: G.nodes[x]['label'])
 
     if st.button("Generate Report"):
@@ -100,75 +133,9 @@ def graph_analysis_page():
 
 
 def visualize_network(G):
-    pos = nx.spring_layout(G)
-    edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-
-    edge_trace = go.Scatter(
-        x=edge_x, y=edge_y,
-        line=dict(width=0.5, color='#888'),
-        hoverinfo='none',
-        mode='lines'
-    )
-
-    node_x, node_y = [], []
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers',
-        hoverinfo='text',
-        marker=dict(
-            showscale=True,
-            colorscale='YlGnBu',
-            reversescale=True,
-            color=[],
-            size=10,
-            colorbar=dict(
-                thickness=15,
-                title='Node Connections',
-                xanchor='left',
-                titleside='right'
-            ),
-            line_width=2
-        )
-    )
-
-    node_adjacencies = []
-    node_text = []
-    for node, adjacencies in enumerate(G.adjacency()):
-        node_adjacencies.append(len(adjacencies[1]))
-        node_text.append(f"Node: {G.nodes[adjacencies[0]]['label']}<br># of connections: {len(adjacencies[1])}")
-
-    node_trace.marker.color = node_adjacencies
-    node_trace.text = node_text
-
-    fig = go.Figure(
-        data=[edge_trace, node_trace],
-        layout=go.Layout(
-            title='Network Graph',
-            titlefont_size=16,
-            showlegend=False,
-            hovermode='closest',
-            margin=dict(b=20, l=5, r=5, t=40),
-            annotations=[dict(
-                text="",
-                showarrow=False,
-                xref="paper", yref="paper",
-                x=0.005, y=-0.002
-            )],
-            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
-        )
-    )
-    return fig
+    with span("layout"):
+        coords = cached_coords(G)
+    return render_graph(G, coords, 'Network Graph')
 
 
 def display_report(report, G):
@@ -205,24 +172,9 @@ def generate_report(G, offering_id):
     if offering_id not in G.nodes or G.nodes[offering_id]['group'] != 'offering':
         raise ValueError(f"{offering_id} is not a valid offering node.")
 
-    subgraph = nx.ego_graph(G, offering_id)
-    modules = [node for node in subgraph.nodes() if G.nodes[node]['group'] == 'module']
-    make_parts = [node for node in subgraph.nodes() if G.nodes[node]['group'] == 'make']
-    purchase_parts = [node for node in subgraph.nodes() if G.nodes[node]['group'] == 'purchase']
-    module_complexity = {module: len(list(G.neighbors(module))) for module in modules}
-
-    report = {
-        'offering_id': offering_id,
-        'offering_name': G.nodes[offering_id]['label'],
-        'num_modules': len(modules),
-        'num_make_parts': len(make_parts),
-        'num_purchase_parts': len(purchase_parts),
-        'module_complexity': module_complexity,
-        'modules': modules,
-        'make_parts': make_parts,
-        'purchase_parts': purchase_parts
-    }
-
+    # Sliced from the offering index built at generation time, instead of walking the graph per report
+    report = get_offering_index(G).report(offering_id)
+    report['offering_name'] = G.nodes[offering_id]['label']
     return report
 
 
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import stat
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import suppress
+
+# Part of every cache key. Bump it whenever the pickled graph classes, the payload generate_graph puts in
+# G.graph (group_index, offering_index, ...) or the graph drawn for given parameters change, so graphs cached by
+# older code are not loaded.
+CACHE_VERSION = 3
+# One directory per user, since cached pickles are loaded back
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(),
+                                 f'graph_gen_cache_{os.getuid()}' if hasattr(os, 'getuid') else 'graph_gen_cache')
+# Temporary files older than this were left by a spill that died mid-write
+STALE_TMP_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(total_nodes, density_factors, module_to_part_ratio, seed, **options):
+    """Content address for a generated graph: a hash of every parameter that affects its output."""
+    params = {
+        'version': CACHE_VERSION,
+        'total_nodes': int(total_nodes),
+        'density_factors': {k: float(v) for k, v in sorted(density_factors.items())},
+        'module_to_part_ratio': float(module_to_part_ratio),
+        'seed': seed,
+        'options': options,
+    }
+    payload = json.dumps(params, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def graph_fingerprint(G):
+    """Version token for a graph. Generated graphs carry one; others are hashed from their nodes and edges once."""
+    fingerprint = G.graph.get('fingerprint')
+    if fingerprint is None:
+        digest = hashlib.sha256()
+        for node in G.nodes():
+            digest.update(repr(node).encode('utf-8'))
+        digest.update(b'|')
+        for u, v in G.edges():
+            digest.update(f'{u!r}-{v!r};'.encode('utf-8'))
+        fingerprint = digest.hexdigest()
+        G.graph['fingerprint'] = fingerprint
+    return fingerprint
+
+
+def private_dir(path):
+    """Create `path` with mode 0700 if needed; True only if it is a directory owned by and private to the
+    current user, so pickles in it can't have been planted by anyone else."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    if hasattr(os, 'getuid'):
+        return info.st_uid == os.getuid() and not info.st_mode & 0o077
+    return True
+
+
+class GraphCache:
+    """LRU cache of generated graphs. Entries evicted from memory are pickled to `cache_dir`, which is only used
+    while it is private to the current user."""
+
+    def __init__(self, max_entries=4, cache_dir=DEFAULT_CACHE_DIR, max_disk_entries=32):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def _on_disk(self, key):
+        return private_dir(self.cache_dir) and os.path.exists(self._path(key))
+
+    def __contains__(self, key):
+        return key in self._entries or self._on_disk(key)
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        path = self._path(key)
+        if not self._on_disk(key):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                graph = pickle.load(f)
+        except Exception:
+            # Truncated files, but also pickles of classes that moved or changed layout (AttributeError,
+            # ImportError, TypeError, ...)
+            logger.warning("Discarding unreadable graph cache entry %s", path, exc_info=True)
+            with suppress(OSError):
+                os.remove(path)
+            return None
+        os.utime(path)
+        self.put(key, graph)
+        return graph
+
+    def put(self, key, graph):
+        self._entries[key] = graph
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, old_graph = self._entries.popitem(last=False)
+            self._spill(old_key, old_graph)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _spill(self, key, graph):
+        path = self._path(key)
+        if not private_dir(self.cache_dir) or os.path.exists(path):
+            return
+        tmp_path = None
+        try:
+            # Unique per writer, so sessions spilling the same key don't write into one file
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix=f'{key}.', dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            # A graph that can't be written is only kept out of the disk cache; put() still succeeds
+            logger.warning("Could not write graph cache entry %s", path, exc_info=True)
+            if tmp_path is not None:
+                with suppress(OSError):
+                    os.remove(tmp_path)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files, now = [], time.time()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue  # Removed by another process meanwhile
+            if name.endswith('.pkl'):
+                files.append((mtime, path))
+            elif name.endswith('.tmp') and now - mtime > STALE_TMP_SECONDS:
+                with suppress(OSError):
+                    os.remove(path)
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            with suppress(OSError):
+                os.remove(path)
+
+
+_graph_cache = None
+
+
+def get_graph_cache():
+    global _graph_cache
+    if _graph_cache is None:
+        _graph_cache = GraphCache()
+    return _graph_cache
@@ -1,35 +1,85 @@
 import streamlit as st
 import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 from constants import *
 import random
-from performance_tracker import measure_performance, format_performance_metrics, get_metrics_explanation
+import os
+import uuid
+from performance_tracker import measure_performance, get_metrics_explanation
+from node_index import GroupIndex, build_group_index
+from offering_index import OfferingIndex
+from batch_generation import draw_structure, build_networkx_graph
+from sharded_generation import build_graph_sharded
+from compact_graph import CompactGraph
+from layout_cache import cached_coords
+from graph_renderer import render_graph
+from graph_cache import make_cache_key, get_graph_cache
+from span_tracer import span, show_phase_breakdown
+from performance_history import record_run
+from centrality_service import get_centrality_cache
 
 
-def poisson_module_generation(mu=3):
-    return max(1, np.random.poisson(mu))
+MAX_PLOT_NODES = 200000
 
 
-def gaussian_part_generation(mean=5, stddev=2):
-    return max(1, int(np.random.normal(mean, stddev)))
+def poisson_module_generation(mu=3, rng=np.random):
+    return max(1, rng.poisson(mu))
+
+
+def gaussian_part_generation(mean=5, stddev=2, rng=np.random):
+    return max(1, int(rng.normal(mean, stddev)))
 
 
 @measure_performance
-def generate_graph(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3):
+def generate_graph(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, batch: bool = False,
+                   seed: int = None, workers: int = None, compact: bool = False):
+    # A given seed drives both the random and the numpy generators, so graphs are reproducible
+    rng = random.Random(seed)
+    np_rng = np.random.RandomState(seed)
+
+    if batch or workers is not None:
+        if workers is not None:
+            # One shard per product offering, drawn and laid out across `workers` processes; the graph does not
+            # depend on `workers`
+            with span('sharded build', workers=workers, compact=compact):
+                G, structure = build_graph_sharded(total_nodes, density_factors, module_to_part_ratio, seed=seed,
+                                                   workers=workers, compact=compact)
+        else:
+            with span('draw structure'):
+                # Same distribution, drawn as NumPy arrays and added in bulk
+                structure = draw_structure(total_nodes, density_factors, module_to_part_ratio,
+                                           rng=np.random.default_rng(seed))
+            # The compact backend is built straight from the arrays, without an intermediate nx.Graph
+            with span('build graph', compact=compact):
+                G = CompactGraph.from_structure(structure) if compact else build_networkx_graph(structure)
+        with span('offering index'):
+            G.graph['offering_index'] = OfferingIndex.from_structure(
+                structure, G.node_id if compact else list(G).__getitem__)
+        # Each generated graph is a new version for the caches keyed on it
+        G.graph['fingerprint'] = uuid.uuid4().hex
+        print(f"Total Nodes Generated: {G.number_of_nodes()}")
+        print(f"Modules: {len(structure.module_offering)}, Parts: {len(structure.part_offering)}")
+        return G
+
     G = nx.Graph()
+    index = GroupIndex()
+    G.graph['group_index'] = index
+    G.graph['fingerprint'] = uuid.uuid4().hex
 
     # Add Business Group Node
     G.add_node('BG001', label='Etch', group='business_group')
+    index.add('BG001', 'business_group')
 
     # Add Product Families and Offerings
     for family in PRODUCT_FAMILIES:
         G.add_node(family['Family_ID'], label=family['Family_Name'], group='family')
         G.add_edge('BG001', family['Family_ID'])
+        index.add(family['Family_ID'], 'family')
 
     for offering in PRODUCT_OFFERINGS:
         G.add_node(offering['Offering_ID'], label=offering['Offering_Name'], group='offering')
         G.add_edge(offering['Family_ID'], offering['Offering_ID'])
+        index.add(offering['Offering_ID'], 'offering')
 
     # Calculate remaining nodes
     remaining_nodes = total_nodes - G.number_of_nodes()
@@ -41,66 +91,97 @@ def generate_graph(total_nodes: int, density_factors: dict, module_to_part_ratio
     part_counter = 0
 
     while G.number_of_nodes() < total_nodes:
-        offering = random.choice(PRODUCT_OFFERINGS)
+        offering = rng.choice(PRODUCT_OFFERINGS)
         offering_id = offering['Offering_ID']
         density_factor = density_factors.get(offering_id, 0.5)
 
-        if random.random() < density_factor:
+        if rng.random() < density_factor:
             if module_counter < modules_count:
                 # Use Poisson distribution for module generation
-                num_modules = poisson_module_generation(mu=int(3 * density_factor))
+                num_modules = poisson_module_generation(mu=int(3 * density_factor), rng=np_rng)
                 for i in range(num_modules):
                     module_id = f'M_{offering_id}_{module_counter:04d}'
                     G.add_node(module_id, label=f'Module {module_counter}', group='module')
                     G.add_edge(offering_id, module_id)
+                    index.add(module_id, 'module')
                     module_counter += 1
             else:
                 # Use Gaussian distribution for part generation
-                num_parts = gaussian_part_generation(mean=5, stddev=2)
+                num_parts = gaussian_part_generation(mean=5, stddev=2, rng=np_rng)
                 for i in range(num_parts):
                     part_id = f'P_{offering_id}_{part_counter:04d}'
-                    part_type = random.choice(['make', 'purchase'])
+                    part_type = rng.choice(['make', 'purchase'])
                     G.add_node(part_id, label=f'{part_type.capitalize()} Part {part_counter}', group=part_type)
+                    index.add(part_id, part_type)
 
-                    if module_counter > 0 and random.random() < 0.7:
-                        random_module = random.choice([n for n in G.nodes if G.nodes[n]['group'] == 'module'])
+                    if module_counter > 0 and rng.random() < 0.7:
+                        random_module = index.choice('module', rng)
                         G.add_edge(random_module, part_id)
                     else:
                         G.add_edge(offering_id, part_id)
                     part_counter += 1
 
+    # The growing lists served random module picks; the finished graph gets the array-backed registry
+    G.graph['group_index'] = build_group_index(G)
+    with span('offering index'):
+        G.graph['offering_index'] = OfferingIndex.from_graph(G)
     print(f"Total Nodes Generated: {G.number_of_nodes()}")
     print(f"Modules: {module_counter}, Parts: {part_counter}")
     return G
 
 
-def plot_entire_graph(G):
-    pos = nx.spring_layout(G, k=0.5, iterations=50)
-    fig, ax = plt.subplots(figsize=(20, 20))
+@measure_performance
+def load_cached_graph(key):
+    return get_graph_cache().get(key)
+
+
+def cached_generate_graph(total_nodes, density_factors, module_to_part_ratio=0.3, batch=False, seed=None,
+                          workers=None, compact=False):
+    """generate_graph behind the graph cache. Returns (G, performance_metrics, cache_hit).
 
-    for group in COLOR_MAP:
-        nx.draw_networkx_nodes(G, pos,
-                               nodelist=[node for node, data in G.nodes(data=True) if data['group'] == group],
-                               node_color=COLOR_MAP[group],
-                               node_size=100,
-                               alpha=0.8,
-                               label=group,
-                               ax=ax)
+    Unseeded graphs are random by design, so only seeded configurations are cached.
+    """
+    if seed is None:
+        G, performance_metrics = generate_graph(total_nodes=total_nodes, density_factors=density_factors,
+                                                module_to_part_ratio=module_to_part_ratio, batch=batch,
+                                                workers=workers, compact=compact)
+        return G, performance_metrics, False
+
+    # The worker count does not change a sharded graph, only whether sharding is used
+    key = make_cache_key(total_nodes, density_factors, module_to_part_ratio, seed, batch=batch,
+                         sharded=workers is not None, compact=compact)
+    if key in get_graph_cache():
+        G, performance_metrics = load_cached_graph(key)
+        if G is not None:
+            return G, performance_metrics, True
 
-    nx.draw_networkx_edges(G, pos, alpha=0.2, ax=ax)
+    G, performance_metrics = generate_graph(total_nodes=total_nodes, density_factors=density_factors,
+                                            module_to_part_ratio=module_to_part_ratio, batch=batch, seed=seed,
+                                            workers=workers, compact=compact)
+    get_graph_cache().put(key, G)
+    return G, performance_metrics, False
 
-    ax.set_title("Full Graph Visualization")
-    ax.legend()
-    ax.axis('off')
-    plt.tight_layout()
-    return fig
+
+def plot_entire_graph(G):
+    with span("layout"):
+        coords = cached_coords(G)
+    # WebGL traces per group; edges beyond the level-of-detail budget are bundled
+    return render_graph(G, coords, "Full Graph Visualization", color_by='group')
 
 
 def graph_generation_page():
     st.title("Graph Generation and Visualization")
 
-    total_nodes = st.number_input("Enter the total number of nodes:", min_value=100, max_value=100000, value=1000,
+    total_nodes = st.number_input("Enter the total number of nodes:", min_value=100, max_value=1000000, value=1000,
                                   step=100)
+    batch = st.checkbox("Batch generation (vectorized NumPy engine)", value=True)
+    workers = None
+    compact = False
+    if batch:
+        if st.checkbox("Shard generation across product offerings", value=False):
+            workers = st.number_input("Worker processes:", min_value=1, max_value=os.cpu_count() or 1, value=1)
+        compact = st.checkbox("Compact graph backend (CSR arrays, lower memory)", value=True)
+    seed_text = st.text_input("Random seed (leave blank for a new random graph):", value="")
 
     if st.button("Generate Graph"):
         density_factors = {
@@ -111,15 +192,36 @@ def graph_generation_page():
             'PO021': 0.4
         }
 
-        G, performance_metrics = generate_graph(total_nodes=total_nodes, density_factors=density_factors,
-                                                module_to_part_ratio=0.3)
-        st.session_state['graph'] = G
-        st.success(f"Graph generated with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
-
-        st.subheader("Performance Metrics")
-        st.text(format_performance_metrics(performance_metrics))
-        st.info(get_metrics_explanation())
-
-        if total_nodes <= 20000:
-            fig = plot_entire_graph(G)
-            st.pyplot(fig)
+        try:
+            seed = int(seed_text) if seed_text.strip() else None
+        except ValueError:
+            st.error("The random seed must be an integer.")
+            return
+
+        with span("Graph Generation") as root:
+            G, performance_metrics, cache_hit = cached_generate_graph(total_nodes=total_nodes,
+                                                                      density_factors=density_factors,
+                                                                      module_to_part_ratio=0.3, batch=batch, seed=seed,
+                                                                      workers=workers, compact=compact)
+            if st.session_state.get('graph') is not G:
+                # Free the centrality results of the graph being replaced
+                get_centrality_cache().invalidate()
+            st.session_state['graph'] = G
+            record_run('load_cached_graph' if cache_hit else 'generate_graph', performance_metrics, G,
+                       graph_size=total_nodes, params={'batch': batch, 'workers': workers, 'compact': compact,
+                                                       'seed': seed})
+            if cache_hit:
+                st.info("Loaded a previously generated graph for this configuration from the cache.")
+            st.success(f"Graph generated with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges.")
+
+            # Filled in once the plot has been rendered, so the breakdown covers it
+            breakdown = st.container()
+
+            if total_nodes <= MAX_PLOT_NODES:
+                fig = plot_entire_graph(G)
+                with span("streamlit render"):
+                    st.plotly_chart(fig, use_container_width=True)
+
+        show_phase_breakdown(root, breakdown, performance_metrics)
+        with breakdown.expander("Metrics Explanation"):
+            st.info(get_metrics_explanation())
@@ -1,7 +1,10 @@
 import streamlit as st
-import networkx as nx
-import plotly.graph_objects as go
-from performance_tracker import measure_performance, format_performance_metrics
+import numpy as np
+from performance_tracker import measure_performance
+from layout_cache import cached_layout
+from graph_renderer import render_graph
+from span_tracer import span, show_phase_breakdown
+from performance_history import record_run
 
 
 
@@ -11,66 +14,24 @@ def query_subgraph(G, node_id, levels=2):
         st.error(f"Node {node_id} does not exist in the graph.")
         return None
 
-    subgraph_nodes = {node_id}
-    current_level_nodes = {node_id}
+    with span("expand levels", levels=levels):
+        subgraph_nodes = {node_id}
+        current_level_nodes = {node_id}
 
-    for _ in range(levels):
-        next_level_nodes = set()
-        for node in current_level_nodes:
-            next_level_nodes.update(G.neighbors(node))
-        subgraph_nodes.update(next_level_nodes)
-        current_level_nodes = next_level_nodes
+        for _ in range(levels):
+            next_level_nodes = set()
+            for node in current_level_nodes:
+                next_level_nodes.update(G.neighbors(node))
+            subgraph_nodes.update(next_level_nodes)
+            current_level_nodes = next_level_nodes
 
-    subgraph = G.subgraph(subgraph_nodes)
+        subgraph = G.subgraph(subgraph_nodes)
 
-    pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
-
-    edge_x, edge_y = [], []
-    for edge in subgraph.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-
-    edge_trace = go.Scatter(x=edge_x, y=edge_y, line=dict(width=0.5, color='#888'), hoverinfo='none', mode='lines')
-
-    node_x, node_y = [], []
-    for node in subgraph.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-
-    node_trace = go.Scatter(
-        x=node_x, y=node_y, mode='markers', hoverinfo='text',
-        marker=dict(
-            showscale=True, colorscale='YlGnBu', reversescale=True, color=[], size=10,
-            colorbar=dict(thickness=15, title='Node Connections', xanchor='left', titleside='right'),
-            line_width=2
-        )
-    )
-
-    node_adjacencies = []
-    node_text = []
-    for node, adjacencies in enumerate(subgraph.adjacency()):
-        node_adjacencies.append(len(adjacencies[1]))
-        node_text.append(f"Node: {subgraph.nodes[adjacencies[0]]['label']}<br># of connections: {len(adjacencies[1])}")
-
-    node_trace.marker.color = node_adjacencies
-    node_trace.text = node_text
-
-    fig = go.Figure(data=[edge_trace, node_trace],
-                    layout=go.Layout(
-                        title=f'Subgraph for node: {node_id} (Levels: {levels})',
-                        titlefont_size=16,
-                        showlegend=False,
-                        hovermode='closest',
-                        margin=dict(b=20, l=5, r=5, t=40),
-                        annotations=[dict(text="", showarrow=False, xref="paper", yref="paper", x=0.005, y=-0.002)],
-                        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
-                    )
-                    )
-    return fig
+    # Coordinates come from the cached full-graph layout, so the subgraph is not laid out again
+    with span("layout"):
+        pos = cached_layout(G, subgraph.nodes())
+        coords = np.array([pos[node] for node in subgraph.nodes()])
+    return render_graph(subgraph, coords, f'Subgraph for node: {node_id} (Levels: {levels})')
 
 
 def graph_query_page():
@@ -87,17 +48,19 @@ def graph_query_page():
 
     if st.button("Query Subgraph"):
         if node_id in G.nodes:
-            fig, performance_metrics = query_subgraph(G, node_id, levels)
-            st.plotly_chart(fig)
-
-            st.subheader("Performance Metrics")
-            st.text(format_performance_metrics(performance_metrics))
-
-            st.info("""
+            with span("Graph Query") as root:
+                fig, performance_metrics = query_subgraph(G, node_id, levels)
+                record_run('query_subgraph', performance_metrics, G, params={'levels': levels})
+                breakdown = st.container()
+                with span("streamlit render"):
+                    st.plotly_chart(fig)
+
+            show_phase_breakdown(root, breakdown, performance_metrics)
+            breakdown.info("""
             Explanation of metrics:
-            - Execution Time: The total time taken to run the query and generate the subgraph.
-            - Memory Used: The additional memory consumed during the operation.
-            - Peak Memory: The maximum memory usage observed during the operation.
+            - Total: The time spent in a phase, including the phases nested under it, in seconds.
+            - Self: The time spent in a phase outside of its nested phases, in seconds.
+            - query_subgraph: Running the query, generating the subgraph and building its figure.
             """)
         else:
             st.error(f"Node {node_id} not found in the graph.")
\ No newline at end of file
@@ -0,0 +1,136 @@
+import numpy as np
+import plotly.graph_objects as go
+from compact_graph import CompactGraph
+from node_index import get_group_index
+from constants import COLOR_MAP
+from span_tracer import traced
+
+# Level-of-detail budgets: beyond these, edges are bundled or sampled and hover text is dropped
+DEFAULT_MAX_EDGES = 50000
+DEFAULT_MAX_HOVER_NODES = 20000
+
+
+def edge_rows(G):
+    """Edges as two arrays of node rows, in the node order of list(G.nodes())."""
+    if isinstance(G, CompactGraph):
+        sources = np.repeat(np.arange(G.number_of_nodes()), G.degree_array())
+        targets = G.indices.astype(np.int64)
+        keep = sources < targets
+        return sources[keep], targets[keep]
+    rows = {node: i for i, node in enumerate(G.nodes())}
+    edges = np.array([(rows[u], rows[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    return edges[:, 0], edges[:, 1]
+
+
+def node_degrees(G):
+    if isinstance(G, CompactGraph):
+        return G.degree_array()
+    return np.array([d for _, d in G.degree()], dtype=np.int64)
+
+
+def level_of_detail(coords, sources, targets, max_edges=DEFAULT_MAX_EDGES, priority=None):
+    """Reduce an edge set to at most `max_edges` segments.
+
+    Edges with the lowest `priority` (e.g. the source's depth in the hierarchy) are kept as they are. The rest
+    are bundled: every source draws one segment to the centroid of its dropped targets. If the bundles alone
+    still exceed the budget, an evenly spaced subset of them is kept. Returns (starts, ends, bundled edge count).
+    """
+    if len(sources) <= max_edges:
+        return coords[sources], coords[targets], 0
+
+    order = np.argsort(priority if priority is not None else np.zeros(len(sources)), kind='stable')
+    bundle_budget = max_edges // 2
+    kept, dropped = order[:max_edges - bundle_budget], order[max_edges - bundle_budget:]
+
+    bundle_sources, inverse = np.unique(sources[dropped], return_inverse=True)
+    counts = np.bincount(inverse)
+    centroids = np.column_stack([np.bincount(inverse, weights=coords[targets[dropped], axis]) / counts
+                                 for axis in range(2)])
+    if len(bundle_sources) > bundle_budget:
+        pick = np.linspace(0, len(bundle_sources) - 1, bundle_budget).astype(np.int64)
+        bundle_sources, centroids = bundle_sources[pick], centroids[pick]
+
+    start = np.concatenate([coords[sources[kept]], coords[bundle_sources]])
+    end = np.concatenate([coords[targets[kept]], centroids])
+    return start, end, len(dropped)
+
+
+def edge_trace(start, end, width=0.5, color='#888'):
+    xy = np.full((len(start), 3, 2), np.nan)
+    xy[:, 0] = start
+    xy[:, 1] = end
+    xy = xy.reshape(-1, 2)
+    return go.Scattergl(x=xy[:, 0], y=xy[:, 1], line=dict(width=width, color=color), hoverinfo='none',
+                        mode='lines')
+
+
+@traced('build figure')
+def render_graph(G, coords, title, color_by='degree', colorscale='YlGnBu', highlight_path=None,
+                 max_edges=DEFAULT_MAX_EDGES, max_hover_nodes=DEFAULT_MAX_HOVER_NODES):
+    """WebGL figure of G from an (n, 2) coordinate array aligned with list(G.nodes()).
+
+    color_by='degree' draws one marker trace coloured by number of connections; color_by='group' draws one
+    trace per node group with the COLOR_MAP colours and a legend. `highlight_path` is a list of node IDs drawn
+    as a red polyline on top.
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    sources, targets = edge_rows(G)
+    degrees = node_degrees(G)
+    index = get_group_index(G)
+
+    # Group codes follow the COLOR_MAP order, from the business group down to parts
+    priority = index.codes[sources] if len(sources) else None
+    start, end, bundled = level_of_detail(coords, sources, targets, max_edges, priority)
+    traces = [edge_trace(start, end)]
+
+    show_hover = len(coords) <= max_hover_nodes
+    text = None
+    if show_hover:
+        text = np.array([f"Node: {data.get('label', node)}<br># of connections: {degree}"
+                         for (node, data), degree in zip(G.nodes(data=True), degrees.tolist())], dtype=object)
+
+    if color_by == 'group':
+        for group, color in COLOR_MAP.items():
+            rows = index.positions(group)
+            if not len(rows):
+                continue
+            traces.append(go.Scattergl(
+                x=coords[rows, 0], y=coords[rows, 1], mode='markers', name=group,
+                hoverinfo='text' if show_hover else 'skip', text=text[rows] if show_hover else None,
+                marker=dict(color=color, size=6 if len(coords) > max_hover_nodes else 10, opacity=0.8)
+            ))
+    else:
+        traces.append(go.Scattergl(
+            x=coords[:, 0], y=coords[:, 1], mode='markers',
+            hoverinfo='text' if show_hover else 'skip', text=text,
+            marker=dict(
+                showscale=True, colorscale=colorscale, reversescale=True, color=degrees,
+                size=6 if len(coords) > max_hover_nodes else 10,
+                colorbar=dict(thickness=15, title='Node Connections', xanchor='left', titleside='right'),
+                line_width=0 if len(coords) > max_hover_nodes else 2
+            )
+        ))
+
+    if highlight_path:
+        if isinstance(G, CompactGraph):
+            path_rows = np.array([G.position(node) for node in highlight_path])
+        else:
+            rows = {node: i for i, node in enumerate(G.nodes())}
+            path_rows = np.array([rows[node] for node in highlight_path])
+        traces.insert(1, edge_trace(coords[path_rows[:-1]], coords[path_rows[1:]], width=3, color='red'))
+
+    if bundled:
+        title = f"{title} ({bundled} edges bundled for display)"
+
+    return go.Figure(
+        data=traces,
+        layout=go.Layout(
+            title=title,
+            titlefont_size=16,
+            showlegend=color_by == 'group',
+            hovermode='closest',
+            margin=dict(b=20, l=5, r=5, t=40),
+            xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
+        )
+    )
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from typing import NamedTuple
+import numpy as np
+from compact_graph import CompactGraph, GROUPS, group_codes
+from graph_cache import graph_fingerprint
+from tree_layout import graph_arrays
+from span_tracer import span
+
+DEGREE_BINS = 20
+MAX_CACHED_STATS = 8
+
+
+class GraphStats(NamedTuple):
+    """Summary statistics of a graph, as shown at the top of the analysis page."""
+    num_nodes: int
+    num_edges: int
+    average_degree: float
+    density: float
+    num_components: int
+    degree: np.ndarray  # degree of every node, in G.nodes() order
+    degree_counts: np.ndarray  # number of nodes with each degree 0..max
+    degree_histogram: tuple  # (counts, bin edges) over DEGREE_BINS equal-width bins
+    group_counts: dict  # group -> number of nodes, for groups that occur
+
+
+def edge_array(G):
+    """(num_nodes, sources, targets) with every undirected edge once, as node positions."""
+    if isinstance(G, CompactGraph):
+        indptr, indices = G.indptr, G.indices
+    else:
+        _, indptr, indices, _ = graph_arrays(G)
+    n = len(indptr) - 1
+    sources = np.repeat(np.arange(n), np.diff(indptr))
+    keep = sources < indices
+    return n, sources[keep], indices[keep].astype(np.int64)
+
+
+def count_components(n, sources, targets):
+    """Connected components by union-find over the whole edge array at once.
+
+    Each round hooks the larger of an edge's two roots under the smaller one, then compresses every node's
+    parent pointer to its root by pointer jumping. Rounds repeat until no edge joins two different roots.
+    """
+    parent = np.arange(n)
+    while True:
+        root_u, root_v = parent[sources], parent[targets]
+        joins = root_u != root_v
+        if not joins.any():
+            break
+        np.minimum.at(parent, np.maximum(root_u, root_v)[joins], np.minimum(root_u, root_v)[joins])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return int(np.count_nonzero(parent == np.arange(n)))
+
+
+def compute_stats(G):
+    n, sources, targets = edge_array(G)
+    m = len(sources)
+    degree = np.bincount(sources, minlength=n) + np.bincount(targets, minlength=n)
+    codes = np.bincount(group_codes(G), minlength=len(GROUPS) + 1)
+    return GraphStats(
+        num_nodes=n,
+        num_edges=m,
+        average_degree=2 * m / n if n else 0.0,
+        density=2 * m / (n * (n - 1)) if n > 1 else 0.0,
+        num_components=count_components(n, sources, targets),
+        degree=degree,
+        degree_counts=np.bincount(degree),
+        degree_histogram=np.histogram(degree, bins=DEGREE_BINS),
+        group_counts={group: int(count) for group, count in zip(GROUPS, codes) if count},
+    )
+
+
+_stats = OrderedDict()
+
+
+def graph_stats(G):
+    """GraphStats of G, computed once per graph version."""
+    key = graph_fingerprint(G)
+    if key in _stats:
+        _stats.move_to_end(key)
+        return _stats[key]
+    with span("graph statistics"):
+        stats = compute_stats(G)
+    _stats[key] = stats
+    while len(_stats) > MAX_CACHED_STATS:
+        _stats.popitem(last=False)
+    return stats
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+import numpy as np
+from compact_graph import CompactGraph
+from graph_cache import graph_fingerprint
+from tree_layout import tree_layout_arrays
+from span_tracer import span
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Rough cost of one entry in a node -> row dict, used for the memory estimate of NetworkX layouts
+_INDEX_BYTES_PER_NODE = 120
+
+
+class LayoutEntry:
+    """Coordinates of every node of one graph version, in the graph's node order."""
+
+    def __init__(self, nodes, coords):
+        self.nodes = nodes
+        self.coords = coords
+        self._rows = None
+
+    def nbytes(self):
+        index_bytes = 0 if self._rows is None else _INDEX_BYTES_PER_NODE * len(self._rows)
+        return self.coords.nbytes + index_bytes
+
+    def rows(self, G, nodes):
+        if isinstance(G, CompactGraph):
+            return np.array([G.position(node) for node in nodes], dtype=np.int64)
+        if self._rows is None:
+            self._rows = {node: i for i, node in enumerate(self.nodes)}
+        return np.array([self._rows[node] for node in nodes], dtype=np.int64)
+
+
+class LayoutCache:
+    """Full-graph layouts keyed on (graph fingerprint, layout kind), evicted LRU under a memory budget."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.memory_budget = memory_budget
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, G, kind='radial'):
+        key = (graph_fingerprint(G), kind)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        with span('tree layout', kind=kind):
+            nodes, coords = tree_layout_arrays(G, kind)
+        entry = LayoutEntry(nodes, coords)
+        self._entries[key] = entry
+        self._evict()
+        return entry
+
+    def positions(self, G, nodes=None, kind='radial'):
+        """pos dict as returned by nx layouts, for `nodes` (default: all) sliced from the cached full layout."""
+        entry = self.entry(G, kind)
+        if nodes is None:
+            return dict(zip(entry.nodes, entry.coords))
+        nodes = list(nodes)
+        coords = entry.coords[entry.rows(G, nodes)]
+        self._evict()
+        return dict(zip(nodes, coords))
+
+    def nbytes(self):
+        return sum(entry.nbytes() for entry in self._entries.values())
+
+    def clear(self):
+        self._entries.clear()
+
+    def _evict(self):
+        # The most recent entry always stays, even when it alone exceeds the budget
+        while len(self._entries) > 1 and self.nbytes() > self.memory_budget:
+            self._entries.popitem(last=False)
+
+
+_layout_cache = None
+
+
+def get_layout_cache():
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = LayoutCache()
+    return _layout_cache
+
+
+def cached_layout(G, nodes=None, kind='radial'):
+    return get_layout_cache().positions(G, nodes, kind)
+
+
+def cached_coords(G, kind='radial'):
+    """(n, 2) coordinates aligned with list(G.nodes()), straight from the cache without building a dict."""
+    return get_layout_cache().entry(G, kind).coords
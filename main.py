@@ -3,11 +3,25 @@ from graph_generation import graph_generation_page
 from graph_analysis import graph_analysis_page
 from graph_query import graph_query_page
 from shortest_path import shortest_path_page
+from performance_history import performance_history_page
+from performance_tracker import MODES, get_measurement_mode, measurement_mode
+
+PAGES = {
+    "Graph Generation": graph_generation_page,
+    "Graph Analysis": graph_analysis_page,
+    "Graph Query": graph_query_page,
+    "Shortest Path": shortest_path_page,
+    "Performance History": performance_history_page,
+}
 
 
 def main():
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ["Home", "Graph Generation", "Graph Analysis", "Graph Query", "Shortest Path"])
+    page = st.sidebar.radio("Go to", ["Home", *PAGES])
+    # Kept in this session's state; the process-wide default only sets the initial choice
+    mode = st.sidebar.selectbox("Measurement mode", MODES, index=MODES.index(get_measurement_mode()),
+                                key="measurement_mode",
+                                help="'timing' is cheapest, 'tracemalloc' slows allocation-heavy code")
 
     if page == "Home":
         st.title("Graph Analysis App")
@@ -36,14 +50,9 @@ def main():
         Please start exploring and generating your own **supply chain network** now!!
         """)
 
-    elif page == "Graph Generation":
-        graph_generation_page()
-    elif page == "Graph Analysis":
-        graph_analysis_page()
-    elif page == "Graph Query":
-        graph_query_page()
-    elif page == "Shortest Path":
-        shortest_path_page()
+    else:
+        with measurement_mode(mode):
+            PAGES[page]()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+import random
+from collections.abc import Sequence
+import numpy as np
+import networkx as nx
+from constants import COLOR_MAP
+
+GROUPS = list(COLOR_MAP)
+GROUP_CODES = {group: code for code, group in enumerate(GROUPS)}
+
+
+class GroupIndex:
+    """Node IDs partitioned by group, kept in insertion order as the graph grows."""
+
+    def __init__(self):
+        self._nodes = {group: [] for group in COLOR_MAP}
+
+    def add(self, node, group):
+        self._nodes.setdefault(group, []).append(node)
+
+    def extend(self, nodes, group):
+        self._nodes.setdefault(group, []).extend(nodes)
+
+    def groups(self):
+        return list(self._nodes)
+
+    def nodes(self, group):
+        return self._nodes.get(group, [])
+
+    def count(self, group):
+        return len(self._nodes.get(group, ()))
+
+    def choice(self, group, rng=random):
+        return rng.choice(self._nodes[group])
+
+    def sample(self, group, k, rng=random):
+        nodes = self.nodes(group)
+        return rng.sample(nodes, min(k, len(nodes)))
+
+
+class _GroupNodes(Sequence):
+    """Read-only sequence of the node IDs of one group, derived from positions on access."""
+
+    def __init__(self, registry, positions):
+        self._registry = registry
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._registry.node_id(p) for p in self.positions[i].tolist()]
+        return self._registry.node_id(int(self.positions[i]))
+
+
+class NodeRegistry:
+    """GroupIndex of a finished graph: node positions (in G.nodes() order) sorted by group into one contiguous
+    array, so each group is a slice. Counts are O(1), sampling k nodes is O(k) and membership is a lookup of
+    the node's group code.
+
+    Node IDs come from `node_ids`, a sequence in G.nodes() order, or are derived from positions by a
+    CompactGraph.
+    """
+
+    def __init__(self, codes, node_ids=None, graph=None):
+        self.codes = np.asarray(codes)
+        order = np.argsort(self.codes, kind='stable')
+        # Nodes without a known group get code len(GROUPS) and sort last
+        bounds = np.searchsorted(self.codes[order], np.arange(len(GROUPS) + 1))
+        self._graph = graph
+        self._ids = None
+        self._rows = None
+        if node_ids is not None:
+            self._ids = np.empty(len(node_ids), dtype=object)
+            self._ids[:] = node_ids
+        self._positions = {group: order[bounds[code]:bounds[code + 1]] for code, group in enumerate(GROUPS)}
+        self._nodes = {group: _GroupNodes(self, positions) for group, positions in self._positions.items()}
+
+    def node_id(self, i):
+        return self._graph.node_id(i) if self._ids is None else self._ids[i]
+
+    def position(self, node):
+        if self._ids is None:
+            return self._graph.position(node)
+        if self._rows is None:
+            self._rows = {node: i for i, node in enumerate(self._ids.tolist())}
+        return self._rows.get(node)
+
+    def groups(self):
+        return list(GROUPS)
+
+    def nodes(self, group):
+        return self._nodes[group]
+
+    def positions(self, group):
+        """Positions of a group's nodes in G.nodes() order, e.g. to index coordinate arrays."""
+        return self._positions[group]
+
+    def count(self, group):
+        return len(self._positions[group])
+
+    def group_of(self, node):
+        i = self.position(node)
+        if i is None or self.codes[i] >= len(GROUPS):
+            return None
+        return GROUPS[self.codes[i]]
+
+    def contains(self, group, node):
+        return self.group_of(node) == group
+
+    def choice(self, group, rng=random):
+        positions = self._positions[group]
+        return self.node_id(int(positions[rng.randrange(len(positions))]))
+
+    def sample(self, group, k, rng=random):
+        positions = self._positions[group]
+        picks = rng.sample(range(len(positions)), min(k, len(positions)))
+        return [self.node_id(int(positions[i])) for i in picks]
+
+
+def build_group_index(G):
+    codes = np.array([GROUP_CODES.get(group, len(GROUPS)) for _, group in G.nodes(data='group')], dtype=np.int64)
+    return NodeRegistry(codes, list(G.nodes()))
+
+
+def get_group_index(G):
+    # Graphs from generate_graph carry their registry; anything else is scanned once and memoized on the graph.
+    # Subgraph views share their parent's G.graph dict and copies inherit its entries, so a registry is only used
+    # when it covers G's own nodes, and never memoized onto a view.
+    index = G.graph.get('group_index')
+    if index is not None and len(index.codes) == G.number_of_nodes():
+        return index
+    index = build_group_index(G)
+    if not nx.is_frozen(G):
+        G.graph['group_index'] = index
+    return index
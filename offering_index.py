@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from batch_generation import OFFERING_IDS, BASE_NODE_COUNT
+from compact_graph import CompactGraph, GROUP_CODES, group_codes
+from tree_layout import graph_arrays, expand_frontier
+
+# Groups that make up the bill of materials of an offering
+BOM_GROUPS = ('module', 'make', 'purchase')
+
+
+def _take_owner(owner, indptr, indices, children):
+    # Each child takes the offering of its neighbour that already has one
+    sources, neighbors = expand_frontier(indptr, indices, children)
+    has_owner = owner[neighbors] >= 0
+    owner[sources[has_owner]] = owner[neighbors[has_owner]]
+
+
+class OfferingIndex:
+    """Bill of materials of every product offering: its modules, plus the make and purchase parts under the
+    offering or under any of its modules, whichever offering the part was drawn for.
+
+    Each group's node positions are stored sorted by owning offering, with an offsets array per group, so the
+    BOM of one offering is a slice and a report costs O(size of the result).
+    """
+
+    def __init__(self, offering_ids, members, module_fan_out, node_id):
+        """members maps each of BOM_GROUPS to (positions, owner offering index per position); module_fan_out is
+        the degree of every module, aligned with members['module']."""
+        self.offering_ids = list(offering_ids)
+        self._offering_index = {offering_id: i for i, offering_id in enumerate(self.offering_ids)}
+        self._node_id = node_id
+        self._positions = {}
+        self._offsets = {}
+        num_offerings = len(self.offering_ids)
+        for group in BOM_GROUPS:
+            positions, owners = members[group]
+            order = np.argsort(owners, kind='stable')
+            self._positions[group] = positions[order]
+            self._offsets[group] = np.concatenate([[0], np.cumsum(np.bincount(owners, minlength=num_offerings))])
+            if group == 'module':
+                self._fan_out = np.asarray(module_fan_out)[order]
+
+    @classmethod
+    def from_structure(cls, structure, node_id):
+        """Index of a graph built from a GraphStructure, whose nodes are laid out as the base nodes, the modules
+        and then the parts in counter order (as in CompactGraph and build_networkx_graph)."""
+        num_modules = len(structure.module_offering)
+        modules = BASE_NODE_COUNT + np.arange(num_modules)
+        parts = BASE_NODE_COUNT + num_modules + np.arange(len(structure.part_offering))
+        attached = structure.part_parent >= 0
+        part_owner = structure.part_offering.copy()
+        part_owner[attached] = structure.module_offering[structure.part_parent[attached]]
+        # A module is connected to its offering and to every part attached to it
+        fan_out = 1 + np.bincount(structure.part_parent[attached], minlength=num_modules)
+        make = structure.part_make
+        members = {
+            'module': (modules, structure.module_offering),
+            'make': (parts[make], part_owner[make]),
+            'purchase': (parts[~make], part_owner[~make]),
+        }
+        return cls(OFFERING_IDS, members, fan_out, node_id)
+
+    @classmethod
+    def from_graph(cls, G):
+        """Index of any generated graph, found by walking from each offering to its modules and parts."""
+        nodes, indptr, indices, _ = graph_arrays(G)
+        codes = group_codes(G)
+        node_id = G.node_id if isinstance(G, CompactGraph) else nodes.__getitem__
+        offerings = np.flatnonzero(codes == GROUP_CODES['offering'])
+        owner = np.full(len(codes), -1, dtype=np.int64)
+        owner[offerings] = np.arange(len(offerings))
+        # Modules take the offering next to them, then parts take the module or offering next to them
+        _take_owner(owner, indptr, indices, np.flatnonzero(codes == GROUP_CODES['module']))
+        _take_owner(owner, indptr, indices, np.flatnonzero((codes == GROUP_CODES['make']) |
+                                                           (codes == GROUP_CODES['purchase'])))
+
+        members = {}
+        for group in BOM_GROUPS:
+            positions = np.flatnonzero((codes == GROUP_CODES[group]) & (owner >= 0))
+            members[group] = (positions, owner[positions])
+        fan_out = np.diff(indptr)[members['module'][0]]
+        return cls([node_id(i) for i in offerings.tolist()], members, fan_out, node_id)
+
+    def _slice(self, group, offering):
+        return self._offsets[group][offering], self._offsets[group][offering + 1]
+
+    def nodes(self, offering_id, group):
+        """Node IDs of one BOM group of an offering."""
+        start, end = self._slice(group, self._offering_index[offering_id])
+        return [self._node_id(i) for i in self._positions[group][start:end].tolist()]
+
+    def report(self, offering_id):
+        offering = self._offering_index[offering_id]
+        modules = self.nodes(offering_id, 'module')
+        start, end = self._slice('module', offering)
+        make_parts = self.nodes(offering_id, 'make')
+        purchase_parts = self.nodes(offering_id, 'purchase')
+        return {
+            'offering_id': offering_id,
+            'num_modules': len(modules),
+            'num_make_parts': len(make_parts),
+            'num_purchase_parts': len(purchase_parts),
+            'module_complexity': dict(zip(modules, self._fan_out[start:end].tolist())),
+            'modules': modules,
+            'make_parts': make_parts,
+            'purchase_parts': purchase_parts,
+        }
+
+    def summary(self):
+        """One row per offering with its BOM counts and module complexity."""
+        counts = {group: np.diff(self._offsets[group]) for group in BOM_GROUPS}
+        module_offsets = self._offsets['module']
+        has_modules = counts['module'] > 0
+        max_fan_out = np.zeros(len(self.offering_ids), dtype=np.int64)
+        total_fan_out = np.zeros(len(self.offering_ids), dtype=np.int64)
+        if len(self._fan_out):
+            starts = module_offsets[:-1][has_modules]
+            max_fan_out[has_modules] = np.maximum.reduceat(self._fan_out, starts)
+            total_fan_out[has_modules] = np.add.reduceat(self._fan_out, starts)
+        return pd.DataFrame({
+            'Offering': self.offering_ids,
+            'Modules': counts['module'],
+            'Make Parts': counts['make'],
+            'Purchase Parts': counts['purchase'],
+            'Avg Module Complexity': np.divide(total_fan_out, counts['module'], out=np.zeros(len(total_fan_out)),
+                                               where=has_modules).round(2),
+            'Max Module Complexity': max_fan_out,
+        })
+
+
+def get_offering_index(G):
+    # Graphs from generate_graph carry their index; anything else is indexed once and memoized on the graph.
+    index = G.graph.get('offering_index')
+    if index is None:
+        index = OfferingIndex.from_graph(G)
+        G.graph['offering_index'] = index
+    return index
@@ -0,0 +1,199 @@
+from collections import OrderedDict
+import numpy as np
+import networkx as nx
+from compact_graph import CompactGraph
+from graph_cache import graph_fingerprint
+from tree_layout import graph_arrays, bfs_forest
+from span_tracer import span
+
+# Euler-tour entries per block of the range-minimum structure; a query scans at most two partial blocks
+BLOCK_SIZE = 32
+MAX_CACHED_INDEXES = 4
+
+
+class PathIndex:
+    """Shortest paths and distances for a generated graph, built once per graph version.
+
+    Every module and part of a generated graph has exactly one parent edge, so the graph is a tree rooted at
+    the business group and the path between two nodes runs through their lowest common ancestor (LCA). The LCA
+    is found as the shallowest node between the two nodes' first occurrences in an Euler tour, using a sparse
+    table over blocks of the tour: O(log N) per query and O(N) memory. Graphs with cycles fall back to a
+    bidirectional BFS over the same CSR arrays.
+    """
+
+    def __init__(self, G):
+        self._graph = G
+        self.nodes, self.indptr, self.indices, rank = graph_arrays(G)
+        n = len(rank)
+        self.parent, self.depth, levels = bfs_forest(self.indptr, self.indices, rank)
+        self.num_components = len(levels[0]) if levels else 0
+        # An acyclic graph has one edge fewer than nodes per component
+        self.is_tree = len(self.indices) // 2 == n - self.num_components
+        self._positions = None if isinstance(G, CompactGraph) else {node: i for i, node in enumerate(self.nodes)}
+
+        if self.is_tree and n:
+            self._build_euler_tour(levels)
+
+    def _build_euler_tour(self, levels):
+        n = len(self.parent)
+        size = np.ones(n, dtype=np.int64)
+        for level in reversed(levels[1:]):
+            size += np.bincount(self.parent[level], weights=size[level], minlength=n).astype(np.int64)
+
+        # Entry index of every node in the tour: a child starts right after its parent's entry plus the tours of
+        # its earlier siblings (2 * size entries each, counting the return to the parent)
+        tin = np.zeros(n, dtype=np.int64)
+        roots = levels[0]
+        tour_length = 2 * size - 1
+        tin[roots] = np.cumsum(tour_length[roots]) - tour_length[roots]
+        root = np.zeros(n, dtype=np.int64)
+        root[roots] = roots
+        for level in levels[1:]:
+            parents = self.parent[level]
+            offset = np.cumsum(2 * size[level]) - 2 * size[level]
+            is_first = np.concatenate([[True], parents[1:] != parents[:-1]])
+            group_first = np.flatnonzero(is_first)
+            tin[level] = tin[parents] + 1 + offset - offset[group_first][np.cumsum(is_first) - 1]
+            root[level] = root[parents]
+
+        tour = np.empty(2 * n - len(roots), dtype=np.int64)
+        tour[tin] = np.arange(n)
+        children = np.flatnonzero(self.parent != np.arange(n))
+        tour[tin[children] + 2 * size[children] - 1] = self.parent[children]
+
+        self.tin = tin
+        self.root = root
+        self.tour = tour
+        self.tour_depth = self.depth[tour].astype(np.int32)
+
+        # Sparse table over the position of the shallowest entry of each block
+        num_blocks = -(-len(tour) // BLOCK_SIZE)
+        padded = np.full(num_blocks * BLOCK_SIZE, np.iinfo(np.int32).max, dtype=np.int32)
+        padded[:len(tour)] = self.tour_depth
+        block_argmin = padded.reshape(num_blocks, BLOCK_SIZE).argmin(axis=1)
+        table = [(np.arange(num_blocks) * BLOCK_SIZE + block_argmin).astype(np.int64)]
+        k = 1
+        while 2 * k <= num_blocks:
+            prev = table[-1]
+            left, right = prev[:-k], prev[k:]
+            table.append(np.where(self.tour_depth[left] <= self.tour_depth[right], left, right))
+            k *= 2
+        self._table = table
+
+    # Node ID <-> position
+
+    def position(self, node):
+        i = self._graph.position(node) if self._positions is None else self._positions.get(node)
+        if i is None:
+            raise nx.NodeNotFound(f"Node {node} is not in the graph")
+        return i
+
+    def node_id(self, i):
+        return self._graph.node_id(i) if self._positions is None else self.nodes[i]
+
+    # Queries
+
+    def _range_min(self, lo, hi):
+        """Tour position of the shallowest entry in tour[lo:hi + 1]."""
+        depth = self.tour_depth
+        first_block, last_block = lo // BLOCK_SIZE, hi // BLOCK_SIZE
+        if last_block - first_block <= 1:
+            return lo + int(depth[lo:hi + 1].argmin())
+
+        candidates = []
+        head_end = (first_block + 1) * BLOCK_SIZE
+        candidates.append(lo + int(depth[lo:head_end].argmin()))
+        tail_start = last_block * BLOCK_SIZE
+        candidates.append(tail_start + int(depth[tail_start:hi + 1].argmin()))
+        a, b = first_block + 1, last_block - 1
+        k = (b - a + 1).bit_length() - 1
+        candidates.append(int(self._table[k][a]))
+        candidates.append(int(self._table[k][b - (1 << k) + 1]))
+        return min(candidates, key=lambda i: depth[i])
+
+    def lca_position(self, u, v):
+        if self.root[u] != self.root[v]:
+            return None
+        lo, hi = sorted((int(self.tin[u]), int(self.tin[v])))
+        return int(self.tour[self._range_min(lo, hi)])
+
+    def lca(self, source, target):
+        if not self.is_tree:
+            raise nx.NetworkXError("The graph is not a tree, so lowest common ancestors are undefined")
+        lca = self.lca_position(self.position(source), self.position(target))
+        return None if lca is None else self.node_id(lca)
+
+    def distance(self, source, target):
+        u, v = self.position(source), self.position(target)
+        if not self.is_tree:
+            return len(self._bidirectional_bfs(u, v)) - 1
+        lca = self.lca_position(u, v)
+        if lca is None:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        return int(self.depth[u] + self.depth[v] - 2 * self.depth[lca])
+
+    def shortest_path(self, source, target):
+        u, v = self.position(source), self.position(target)
+        if not self.is_tree:
+            return [self.node_id(i) for i in self._bidirectional_bfs(u, v)]
+
+        lca = self.lca_position(u, v)
+        if lca is None:
+            raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+        up = [u]
+        while up[-1] != lca:
+            up.append(int(self.parent[up[-1]]))
+        down = [v]
+        while down[-1] != lca:
+            down.append(int(self.parent[down[-1]]))
+        return [self.node_id(i) for i in up + down[-2::-1]]
+
+    def _bidirectional_bfs(self, u, v):
+        """Node positions of a shortest path, expanding the smaller of the two frontiers each round."""
+        if u == v:
+            return [u]
+        parents = ({u: None}, {v: None})
+        frontiers = ([u], [v])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, other = parents[side], parents[1 - side]
+            next_frontier = []
+            for i in frontiers[side]:
+                for j in self.indices[self.indptr[i]:self.indptr[i + 1]].tolist():
+                    if j in seen:
+                        continue
+                    seen[j] = i
+                    if j in other:
+                        return self._join(parents, j)
+                    next_frontier.append(j)
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+        raise nx.NetworkXNoPath(f"No path between {self.node_id(u)} and {self.node_id(v)}.")
+
+    @staticmethod
+    def _join(parents, meet):
+        forward = [meet]
+        while parents[0][forward[-1]] is not None:
+            forward.append(parents[0][forward[-1]])
+        backward = []
+        i = parents[1][meet]
+        while i is not None:
+            backward.append(i)
+            i = parents[1][i]
+        return forward[::-1] + backward
+
+
+_indexes = OrderedDict()
+
+
+def get_path_index(G):
+    """PathIndex of G, reused while the graph version is unchanged."""
+    key = graph_fingerprint(G)
+    if key in _indexes:
+        _indexes.move_to_end(key)
+        return _indexes[key]
+    with span("build path index"):
+        index = PathIndex(G)
+    _indexes[key] = index
+    while len(_indexes) > MAX_CACHED_INDEXES:
+        _indexes.popitem(last=False)
+    return index
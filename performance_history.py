@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import subprocess
+from contextlib import closing
+from datetime import datetime, timezone
+from functools import lru_cache
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+DEFAULT_DB_PATH = os.environ.get('GRAPH_GEN_PERF_DB', 'performance_history.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    graph_size INTEGER,
+    num_nodes INTEGER,
+    num_edges INTEGER,
+    params TEXT,
+    git_rev TEXT,
+    mode TEXT,
+    execution_time REAL NOT NULL,
+    memory_used REAL,
+    peak_memory REAL
+);
+CREATE INDEX IF NOT EXISTS runs_operation ON runs (operation, recorded_at);
+"""
+
+
+# Params that describe a single run rather than the code path measured; left out of configurations
+RUN_PARAMS = ('seed', 'path_length')
+
+
+def configuration_params(params):
+    """The recorded params JSON without RUN_PARAMS, as a canonical JSON string."""
+    params = json.loads(params) if params else {}
+    return json.dumps({key: value for key, value in params.items() if key not in RUN_PARAMS}, sort_keys=True)
+
+
+@lru_cache(maxsize=None)
+def git_revision():
+    """Short commit of the code being measured, suffixed with -dirty for uncommitted changes; None outside git."""
+    try:
+        result = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                                timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+class PerformanceHistory:
+    """Append-only SQLite log of measured runs, one row per measure_performance result."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, operation, metrics, G=None, graph_size=None, params=None):
+        row = (
+            datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            operation,
+            graph_size,
+            None if G is None else G.number_of_nodes(),
+            None if G is None else G.number_of_edges(),
+            json.dumps(params or {}, sort_keys=True, default=str),
+            git_revision(),
+            metrics.get('mode'),
+            metrics['execution_time'],
+            metrics.get('memory_used'),
+            metrics.get('peak_memory'),
+        )
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (recorded_at, operation, graph_size, num_nodes, num_edges, params, git_rev, mode, "
+                "execution_time, memory_used, peak_memory) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            return cursor.lastrowid
+
+    def operations(self):
+        with closing(self._connect()) as conn:
+            return [name for name, in conn.execute("SELECT DISTINCT operation FROM runs ORDER BY operation")]
+
+    def runs(self, operation=None):
+        query = "SELECT * FROM runs"
+        args = ()
+        if operation is not None:
+            query += " WHERE operation = ?"
+            args = (operation,)
+        with closing(self._connect()) as conn:
+            runs = pd.read_sql_query(query + " ORDER BY recorded_at, id", conn, params=args)
+        runs['recorded_at'] = pd.to_datetime(runs['recorded_at'])
+        return runs
+
+    def revision_summary(self, operation):
+        """Median time and peak memory per configuration and git revision, revisions in order of first use.
+
+        A configuration is the measurement mode plus the recorded params (except RUN_PARAMS), since both change
+        timings on their own. time_change_% compares each revision with the previous one in the same configuration
+        on the graph sizes both have measured, to spot regressions.
+        """
+        runs = self.runs(operation)
+        if runs.empty:
+            return runs
+        runs['git_rev'] = runs['git_rev'].fillna('unknown')
+        runs['mode'] = runs['mode'].fillna('unknown')
+        runs['params'] = runs['params'].map(configuration_params)
+        runs['size'] = runs['graph_size'].fillna(runs['num_nodes']).astype(float)
+
+        summaries = []
+        for (mode, params), group in runs.groupby(['mode', 'params'], sort=False):
+            summary = group.groupby('git_rev', sort=False).agg(
+                first_run=('recorded_at', 'min'), runs=('id', 'count'), median_time=('execution_time', 'median'),
+                median_peak_memory=('peak_memory', 'median')).sort_values('first_run')
+            by_size = group.pivot_table(index='size', columns='git_rev', values='execution_time', aggfunc='median')
+            by_size = by_size.reindex(columns=summary.index)
+            summary['time_change_%'] = 100 * (by_size.div(by_size.shift(axis=1)).median() - 1)
+            summaries.append(summary.reset_index().assign(mode=mode, params=params))
+        columns = ['mode', 'params', 'git_rev', 'first_run', 'runs', 'median_time', 'median_peak_memory',
+                   'time_change_%']
+        return pd.concat(summaries, ignore_index=True)[columns]
+
+_history = None
+
+
+def get_performance_history():
+    global _history
+    if _history is None:
+        _history = PerformanceHistory()
+    return _history
+
+
+def record_run(operation, metrics, G=None, graph_size=None, params=None):
+    """Append a run to the history. A history that cannot be written never breaks the measured page."""
+    try:
+        return get_performance_history().record(operation, metrics, G, graph_size, params)
+    except sqlite3.Error as e:
+        print(f"Could not record performance history: {e}")
+        return None
+
+
+def performance_history_page():
+    st.title("Performance History")
+    st.write("Every measured generation and query is stored with the graph size and the code revision it ran on. "
+             "Compare revisions here to catch performance regressions.")
+
+    history = get_performance_history()
+    operations = history.operations()
+    if not operations:
+        st.info("No runs recorded yet. Generate or query a graph first.")
+        return
+
+    operation = st.selectbox("Operation", operations)
+    runs = history.runs(operation)
+    runs['git_rev'] = runs['git_rev'].fillna('unknown')
+    runs['size'] = runs['graph_size'].fillna(runs['num_nodes']).astype(float)
+
+    revisions = list(dict.fromkeys(runs['git_rev']))
+    selected = st.multiselect("Revisions", revisions, default=revisions[-5:])
+    runs = runs[runs['git_rev'].isin(selected)]
+    if runs.empty:
+        st.warning("Select at least one revision.")
+        return
+
+    st.subheader("Latency vs Graph Size")
+    st.plotly_chart(px.scatter(runs, x='size', y='execution_time', color='git_rev', log_x=True,
+                               hover_data=['recorded_at', 'num_edges', 'mode', 'params'],
+                               labels={'size': 'Graph size (nodes)', 'execution_time': 'Time (seconds)',
+                                       'git_rev': 'Revision'}),
+                    use_container_width=True)
+
+    memory_runs = runs.dropna(subset=['peak_memory'])
+    if not memory_runs.empty:
+        st.subheader("Peak Memory vs Graph Size")
+        st.plotly_chart(px.scatter(memory_runs, x='size', y='peak_memory', color='git_rev', symbol='mode', log_x=True,
+                                   labels={'size': 'Graph size (nodes)', 'peak_memory': 'Peak memory (MB)',
+                                           'git_rev': 'Revision'}),
+                        use_container_width=True)
+
+    st.subheader("Latency over Time")
+    st.plotly_chart(px.scatter(runs, x='recorded_at', y='execution_time', color='git_rev', size='size',
+                               labels={'recorded_at': 'Recorded at', 'execution_time': 'Time (seconds)',
+                                       'git_rev': 'Revision'}),
+                    use_container_width=True)
+
+    st.subheader("Revisions")
+    st.write("Median time per revision, for each measurement mode and configuration (the recorded params). The "
+             "change column compares each revision with the previous one in the same mode and configuration, on the "
+             "graph sizes both have measured.")
+    st.dataframe(history.revision_summary(operation), use_container_width=True, hide_index=True)
+
+    with st.expander("All runs"):
+        st.dataframe(runs, use_container_width=True, hide_index=True)
@@ -0,0 +1,125 @@
+import math
+from typing import NamedTuple
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from batch_generation import (GraphStructure, BASE_NODE_COUNT, PART_ATTACH_PROBABILITY, OFFERING_IDS,
+                              density_array, build_networkx_graph)
+from compact_graph import CompactGraph, FIRST_OFFERING
+
+
+class ShardBlock(NamedTuple):
+    """One offering's modules and parts, drawn by a worker at the positions fixed by the shard plan."""
+    part_make: np.ndarray  # True for make parts
+    part_parent: np.ndarray  # module index per part, -1 when attached to the offering
+    module_parents: np.ndarray  # int32 parent position per module
+    part_parents: np.ndarray  # int32 parent position per part
+    module_ids: list  # node IDs, only filled for a NetworkX graph
+    part_ids: list
+    parent_ids: list  # parent node ID per part
+
+
+def _build_shard(task):
+    offering, module_bounds, part_start, num_parts, seed_seq, with_ids = task
+    rng = np.random.default_rng(seed_seq)
+    num_modules = int(module_bounds[-1])
+    part_make = rng.random(num_parts) < 0.5
+    if num_modules:
+        part_parent = rng.integers(0, num_modules, size=num_parts)
+        part_parent[rng.random(num_parts) >= PART_ATTACH_PROBABILITY] = -1
+    else:
+        part_parent = np.full(num_parts, -1, dtype=np.int64)
+
+    module_start, module_end = int(module_bounds[offering]), int(module_bounds[offering + 1])
+    module_parents = np.full(module_end - module_start, FIRST_OFFERING + offering, dtype=np.int32)
+    part_parents = np.where(part_parent >= 0, BASE_NODE_COUNT + part_parent, FIRST_OFFERING + offering).astype(np.int32)
+    if not with_ids:
+        return ShardBlock(part_make, part_parent, module_parents, part_parents, [], [], [])
+
+    # Same IDs as batch_generation.module_ids / part_ids, from the global serials of this shard
+    offering_id = OFFERING_IDS[offering]
+    module_ids = [f'M_{offering_id}_{i:04d}' for i in range(module_start, module_end)]
+    part_ids = [f'P_{offering_id}_{i:04d}' for i in range(part_start, part_start + num_parts)]
+    # A part's parent module can belong to any offering; the plan's module bounds tell which
+    parent_offering = np.searchsorted(module_bounds, part_parent, side='right') - 1
+    parent_ids = [f'M_{OFFERING_IDS[o]}_{p:04d}' if p >= 0 else offering_id
+                  for p, o in zip(part_parent.tolist(), parent_offering.tolist())]
+    return ShardBlock(part_make, part_parent, module_parents, part_parents, module_ids, part_ids, parent_ids)
+
+
+def _run(fn, tasks, workers):
+    if workers <= 1:
+        return [fn(task) for task in tasks]
+    # Each worker receives a contiguous subset of the offerings
+    chunksize = math.ceil(len(tasks) / workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fn, tasks, chunksize=chunksize))
+
+
+def plan_shards(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, seed=None):
+    """Module and part count per offering shard, plus the seed each part shard draws from.
+
+    The uniform offering pick and density coin flip are folded into a multinomial split of the module and part
+    budgets, weighted by each offering's expected yield. Shards stop exactly at their budget (the trial that would
+    cross it is trimmed), so the counts sum to `total_nodes` and every shard's node positions are known up front.
+    """
+    density = density_array(density_factors)
+    budget_seq, part_seq = np.random.SeedSequence(seed).spawn(2)
+    budget_rng = np.random.default_rng(budget_seq)
+
+    remaining_nodes = max(0, total_nodes - BASE_NODE_COUNT)
+    modules_count = int(remaining_nodes * module_to_part_ratio)
+
+    # Expected nodes per offering pick: density * E[max(1, Poisson(mu))] = density * (mu + exp(-mu))
+    mu = (3 * density).astype(np.int64)
+    module_weights = density * (mu + np.exp(-mu))
+    module_counts = budget_rng.multinomial(modules_count, module_weights / module_weights.sum())
+    # Part counts do not depend on the offering, so the expected yield is proportional to density alone
+    part_counts = budget_rng.multinomial(remaining_nodes - modules_count, density / density.sum())
+    return module_counts, part_counts, part_seq.spawn(len(OFFERING_IDS))
+
+
+def draw_shards(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, seed=None,
+                workers: int = 1, with_ids: bool = False):
+    """GraphStructure and per-offering ShardBlocks, one shard per product offering drawn across `workers`
+    processes. Shards are merged in offering order, so the result only depends on `seed`, never on `workers`."""
+    module_counts, part_counts, part_seqs = plan_shards(total_nodes, density_factors, module_to_part_ratio, seed=seed)
+    module_bounds = np.concatenate([[0], np.cumsum(module_counts)])
+    part_starts = np.concatenate([[0], np.cumsum(part_counts)[:-1]])
+    tasks = [(offering, module_bounds, int(start), int(count), shard_seq, with_ids)
+             for offering, (start, count, shard_seq) in enumerate(zip(part_starts, part_counts, part_seqs))]
+    blocks = _run(_build_shard, tasks, workers)
+
+    num_offerings = len(OFFERING_IDS)
+    structure = GraphStructure(
+        module_offering=np.repeat(np.arange(num_offerings), module_counts),
+        part_offering=np.repeat(np.arange(num_offerings), part_counts),
+        part_make=np.concatenate([block.part_make for block in blocks]),
+        part_parent=np.concatenate([block.part_parent for block in blocks]),
+    )
+    return structure, blocks
+
+
+def draw_structure_sharded(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3,
+                           seed=None, workers: int = 1):
+    """Sharded counterpart of batch_generation.draw_structure."""
+    return draw_shards(total_nodes, density_factors, module_to_part_ratio, seed=seed, workers=workers)[0]
+
+
+def build_graph_sharded(total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, seed=None,
+                        workers: int = 1, compact: bool = False):
+    """(graph, structure) with each shard's parent edges, and for NetworkX its node IDs, built by its worker.
+
+    The parent process only concatenates the blocks: into the CSR arrays of a CompactGraph, or into the node and
+    edge lists a NetworkX graph is filled from (that insertion itself stays serial).
+    """
+    structure, blocks = draw_shards(total_nodes, density_factors, module_to_part_ratio, seed=seed, workers=workers,
+                                    with_ids=not compact)
+    if compact:
+        G = CompactGraph.from_structure(structure,
+                                        module_parents=np.concatenate([block.module_parents for block in blocks]),
+                                        part_parents=np.concatenate([block.part_parents for block in blocks]))
+    else:
+        node_ids = tuple([node for block in blocks for node in getattr(block, field)]
+                         for field in ('module_ids', 'part_ids', 'parent_ids'))
+        G = build_networkx_graph(structure, node_ids)
+    return G, structure
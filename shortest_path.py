@@ -1,118 +1,49 @@
 import streamlit as st
 import networkx as nx
-import plotly.graph_objects as go
-import random
-from performance_tracker import measure_performance, format_performance_metrics,get_metrics_explanation
+import os
+import numpy as np
+import pandas as pd
+from performance_tracker import measure_performance, get_metrics_explanation
+from node_index import get_group_index
+from path_index import get_path_index
+from batch_paths import distance_matrix, UNREACHABLE
+from layout_cache import cached_layout
+from graph_renderer import render_graph
+from span_tracer import span, show_phase_breakdown
+from performance_history import record_run
 
 
 @measure_performance
 def calculate_shortest_path(G, node1, node2):
-    return nx.shortest_path(G, source=node1, target=node2)
+    # Tree graphs answer from the LCA index; graphs with cycles use bidirectional BFS
+    return get_path_index(G).shortest_path(node1, node2)
 
 
 def visualize_shortest_path(G, node1, node2):
     try:
-        path, performance_metrics = calculate_shortest_path(G, node1, node2)
-        st.success(f"Shortest path from {node1} to {node2}: {' -> '.join(path)}")
-
-
-        st.subheader("Performance Metrics")
-        st.text(format_performance_metrics(performance_metrics))
-        st.info(get_metrics_explanation())
-
-        # Create a subgraph containing the shortest path and its neighbors
-        subgraph_nodes = set(path)
-        for node in path:
-            subgraph_nodes.update(G.neighbors(node))
-        subgraph = G.subgraph(subgraph_nodes)
-
-        pos = nx.spring_layout(subgraph, k=0.5, iterations=50)
-
-        edge_x, edge_y = [], []
-        for edge in subgraph.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_x.extend([x0, x1, None])
-            edge_y.extend([y0, y1, None])
-
-        edge_trace = go.Scatter(
-            x=edge_x, y=edge_y,
-            line=dict(width=1, color='#888'),
-            hoverinfo='none',
-            mode='lines'
-        )
-
-        # Highlight the shortest path
-        path_edges = list(zip(path, path[1:]))
-        path_x, path_y = [], []
-        for edge in path_edges:
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            path_x.extend([x0, x1, None])
-            path_y.extend([y0, y1, None])
-
-        path_trace = go.Scatter(
-            x=path_x, y=path_y,
-            line=dict(width=3, color='red'),
-            hoverinfo='none',
-            mode='lines'
-        )
-
-        node_x, node_y = [], []
-        for node in subgraph.nodes():
-            x, y = pos[node]
-            node_x.append(x)
-            node_y.append(y)
-
-        node_trace = go.Scatter(
-            x=node_x, y=node_y,
-            mode='markers',
-            hoverinfo='text',
-            marker=dict(
-                showscale=True,
-                colorscale='Viridis',
-                reversescale=True,
-                color=[],
-                size=10,
-                colorbar=dict(
-                    thickness=15,
-                    title='Node Connections',
-                    xanchor='left',
-                    titleside='right'
-                ),
-                line_width=2
-            )
-        )
-
-        node_adjacencies = []
-        node_text = []
-        for node, adjacencies in enumerate(subgraph.adjacency()):
-            node_adjacencies.append(len(adjacencies[1]))
-            node_text.append(
-                f"Node: {subgraph.nodes[adjacencies[0]]['label']}<br># of connections: {len(adjacencies[1])}")
-
-        node_trace.marker.color = node_adjacencies
-        node_trace.text = node_text
-
-        fig = go.Figure(
-            data=[edge_trace, path_trace, node_trace],
-            layout=go.Layout(
-                title=f'Shortest Path from {node1} to {node2}',
-                titlefont_size=16,
-                showlegend=False,
-                hovermode='closest',
-                margin=dict(b=20, l=5, r=5, t=40),
-                annotations=[dict(
-                    text="",
-                    showarrow=False,
-                    xref="paper", yref="paper",
-                    x=0.005, y=-0.002
-                )],
-                xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
-            )
-        )
-        st.plotly_chart(fig)
+        with span("Shortest Path") as root:
+            path, performance_metrics = calculate_shortest_path(G, node1, node2)
+            record_run('calculate_shortest_path', performance_metrics, G, params={'path_length': len(path) - 1})
+            st.success(f"Shortest path from {node1} to {node2}: {' -> '.join(path)}")
+            breakdown = st.container()
+
+            # Create a subgraph containing the shortest path and its neighbors
+            with span("subgraph"):
+                subgraph_nodes = set(path)
+                for node in path:
+                    subgraph_nodes.update(G.neighbors(node))
+                subgraph = G.subgraph(subgraph_nodes)
+
+            with span("layout"):
+                pos = cached_layout(G, subgraph.nodes())
+                coords = np.array([pos[node] for node in subgraph.nodes()])
+            fig = render_graph(subgraph, coords, f'Shortest Path from {node1} to {node2}', colorscale='Viridis',
+                               highlight_path=path)
+            with span("streamlit render"):
+                st.plotly_chart(fig)
+
+        show_phase_breakdown(root, breakdown, performance_metrics)
+        breakdown.info(get_metrics_explanation())
 
     except nx.NetworkXNoPath:
         st.error(f"No path exists between {node1} and {node2}")
@@ -120,6 +51,66 @@ def visualize_shortest_path(G, node1, node2):
         st.error(f"Node not found: {str(e)}")
 
 
+@measure_performance
+def calculate_distance_matrix(G, sources, targets, return_paths=False, workers=1):
+    return distance_matrix(G, sources, targets, return_paths=return_paths, workers=workers)
+
+
+def batch_distance_section(G):
+    st.subheader("Batch Distances")
+    st.write("Upload a CSV with a `source` and/or a `target` column of node IDs. Every source is measured against "
+             "every target; without a source column, all product offerings are used as sources.")
+
+    uploaded = st.file_uploader("Source/target CSV", type="csv")
+    return_paths = st.checkbox("Include paths", value=False)
+    workers = st.number_input("Worker processes:", min_value=1, max_value=os.cpu_count() or 1, value=1,
+                              key="batch_workers")
+
+    if uploaded is None or not st.button("Compute Distances"):
+        return
+
+    table = pd.read_csv(uploaded, dtype=str)
+    if 'target' not in table.columns:
+        st.error("The CSV needs a 'target' column.")
+        return
+    targets = list(dict.fromkeys(table['target'].dropna().str.strip()))
+    if 'source' in table.columns:
+        sources = list(dict.fromkeys(table['source'].dropna().str.strip()))
+    else:
+        sources = list(get_group_index(G).nodes('offering'))
+
+    missing = [node for node in sources + targets if node not in G.nodes]
+    if missing:
+        st.warning(f"Skipping {len(missing)} unknown node IDs, e.g. {', '.join(missing[:5])}")
+        sources = [node for node in sources if node in G.nodes]
+        targets = [node for node in targets if node in G.nodes]
+    if not sources or not targets:
+        st.error("No known sources or targets to measure.")
+        return
+
+    with span("Batch Distances") as root:
+        result = calculate_distance_matrix(G, sources, targets, return_paths=return_paths, workers=workers)
+        dist, paths, performance_metrics = result if return_paths else (result[0], None, result[1])
+        record_run('calculate_distance_matrix', performance_metrics, G,
+                   params={'sources': len(sources), 'targets': len(targets), 'paths': return_paths,
+                           'workers': workers})
+
+        # Targets as rows, so thousands of parts scroll down against a few dozen offering columns
+        matrix = pd.DataFrame(dist.T, index=pd.Index(targets, name='target'), columns=sources)
+        st.write(f"{len(sources)} sources x {len(targets)} targets, "
+                 f"{int((dist == UNREACHABLE).sum())} pairs without a path (shown as {UNREACHABLE}).")
+        st.dataframe(matrix, use_container_width=True)
+        st.download_button("Download distance matrix", data=matrix.to_csv(), file_name="distance_matrix.csv",
+                           mime="text/csv")
+        if paths is not None:
+            rows = [(source, target, len(path) - 1, ' -> '.join(path)) for (source, target), path in paths.items()]
+            path_table = pd.DataFrame(rows, columns=['source', 'target', 'distance', 'path'])
+            st.download_button("Download paths", data=path_table.to_csv(index=False), file_name="paths.csv",
+                               mime="text/csv")
+
+    show_phase_breakdown(root, metrics=performance_metrics)
+
+
 def shortest_path_page():
     st.title("Shortest Path Visualization")
 
@@ -147,15 +138,18 @@ def shortest_path_page():
         else:
             visualize_shortest_path(G, node1, node2)
 
+    st.write("---")
+    batch_distance_section(G)
+
     st.write("---")
     st.subheader("Node Information")
     st.write("Here's a list of some nodes in the graph for reference:")
 
     # Display a sample of nodes from different groups
+    index = get_group_index(G)
     sample_nodes = []
     for group in ['business_group', 'offering','module', 'make', 'purchase', 'family']:
-        nodes = [node for node, data in G.nodes(data=True) if data.get('group') == group]
-        sample_nodes.extend(random.sample(nodes, min(5, len(nodes))))
+        sample_nodes.extend(index.sample(group, 5))
 
     c = 0
     for node in sample_nodes:
@@ -0,0 +1,254 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+from typing import NamedTuple
+from batch_generation import BASE_NODE_COUNT, PART_ATTACH_PROBABILITY, OFFERING_IDS
+from compact_graph import BASE_IDS, BASE_LABELS, BASE_GROUPS, GROUPS, GROUP_CODES, FIRST_OFFERING
+from constants import PRODUCT_FAMILIES, PRODUCT_OFFERINGS
+from sharded_generation import plan_shards
+
+NO_OFFERING = 255
+
+
+class NodeChunk(NamedTuple):
+    """A contiguous run of node positions starting at `start`. Every node but the root has exactly one
+    parent edge, so `parents` (positions, -1 for the root) is also the chunk's edge list."""
+    start: int
+    group_codes: np.ndarray  # uint8, index into compact_graph.GROUPS
+    offerings: np.ndarray  # uint8 offering index, NO_OFFERING for base nodes
+    parents: np.ndarray  # int64 parent position per node
+
+    def __len__(self):
+        return len(self.group_codes)
+
+    @property
+    def positions(self):
+        return np.arange(self.start, self.start + len(self), dtype=np.int64)
+
+
+class GraphStream:
+    """Generates a graph as a sequence of NodeChunks without ever holding it in memory.
+
+    Uses the per-offering shard plan of sharded_generation (same density-factor, Poisson and Gaussian
+    semantics), so modules of one offering get contiguous serials. That keeps module IDs derivable from
+    21 boundaries, and memory stays proportional to `chunk_size` rather than to the graph.
+    """
+
+    def __init__(self, total_nodes: int, density_factors: dict, module_to_part_ratio: float = 0.3, seed=None,
+                 chunk_size: int = 1_000_000):
+        self.chunk_size = chunk_size
+        self.module_counts, self.part_budgets, self._part_seqs = plan_shards(
+            total_nodes, density_factors, module_to_part_ratio, seed=seed)
+        self.module_bounds = np.concatenate([[0], np.cumsum(self.module_counts)])
+        self.num_modules = int(self.module_bounds[-1])
+        self.first_part = BASE_NODE_COUNT + self.num_modules
+
+    def __iter__(self):
+        yield self._base_chunk()
+        for offering, count in enumerate(self.module_counts.tolist()):
+            start = BASE_NODE_COUNT + int(self.module_bounds[offering])
+            for offset in range(0, count, self.chunk_size):
+                size = min(self.chunk_size, count - offset)
+                yield NodeChunk(start + offset, np.full(size, GROUP_CODES['module'], dtype=np.uint8),
+                                np.full(size, offering, dtype=np.uint8),
+                                np.full(size, FIRST_OFFERING + offering, dtype=np.int64))
+
+        start = self.first_part
+        for offering, (budget, seed_seq) in enumerate(zip(self.part_budgets.tolist(), self._part_seqs)):
+            rng = np.random.default_rng(seed_seq)
+            num_parts = budget
+            for offset in range(0, num_parts, self.chunk_size):
+                size = min(self.chunk_size, num_parts - offset)
+                make = rng.random(size) < 0.5
+                parents = np.full(size, FIRST_OFFERING + offering, dtype=np.int64)
+                if self.num_modules:
+                    modules = BASE_NODE_COUNT + rng.integers(0, self.num_modules, size=size)
+                    attach = rng.random(size) < PART_ATTACH_PROBABILITY
+                    parents[attach] = modules[attach]
+                yield NodeChunk(start, np.where(make, GROUP_CODES['make'], GROUP_CODES['purchase']).astype(np.uint8),
+                                np.full(size, offering, dtype=np.uint8), parents)
+                start += size
+
+    def _base_chunk(self):
+        family_positions = {family['Family_ID']: i + 1 for i, family in enumerate(PRODUCT_FAMILIES)}
+        parents = ([-1] + [0] * len(PRODUCT_FAMILIES) +
+                   [family_positions[offering['Family_ID']] for offering in PRODUCT_OFFERINGS])
+        offerings = [NO_OFFERING] * FIRST_OFFERING + list(range(len(PRODUCT_OFFERINGS)))
+        return NodeChunk(0, np.array([GROUP_CODES[group] for group in BASE_GROUPS], dtype=np.uint8),
+                         np.array(offerings, dtype=np.uint8), np.array(parents, dtype=np.int64))
+
+    def node_ids(self, positions):
+        """String IDs for base and module positions, the only nodes that can be parents. Parts map to None;
+        their IDs need the offering stored in the chunk, see `chunk_ids`."""
+        positions = np.asarray(positions, dtype=np.int64)
+        module_offering = np.searchsorted(self.module_bounds, positions - BASE_NODE_COUNT, side='right') - 1
+        ids = []
+        for position, offering in zip(positions.tolist(), module_offering.tolist()):
+            if position < BASE_NODE_COUNT:
+                ids.append(BASE_IDS[position])
+            elif position < self.first_part:
+                ids.append(f'M_{OFFERING_IDS[offering]}_{position - BASE_NODE_COUNT:04d}')
+            else:
+                ids.append(None)
+        return ids
+
+    def chunk_ids(self, chunk):
+        ids = self.node_ids(chunk.positions)
+        for i, offering in enumerate(chunk.offerings.tolist()):
+            if ids[i] is None:
+                ids[i] = f'P_{OFFERING_IDS[offering]}_{chunk.start + i - self.first_part:04d}'
+        return ids
+
+    def chunk_labels(self, chunk):
+        labels = []
+        for i, code in enumerate(chunk.group_codes.tolist()):
+            position = chunk.start + i
+            if position < BASE_NODE_COUNT:
+                labels.append(BASE_LABELS[position])
+            elif position < self.first_part:
+                labels.append(f'Module {position - BASE_NODE_COUNT}')
+            else:
+                kind = 'Make' if code == GROUP_CODES['make'] else 'Purchase'
+                labels.append(f'{kind} Part {position - self.first_part}')
+        return labels
+
+
+class CsvSink:
+    """nodes.csv (id, label, group) and edges.csv (source, target) with the app's string node IDs."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def open(self, stream):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._stream = stream
+        self._node_file = open(os.path.join(self.output_dir, 'nodes.csv'), 'w', newline='', encoding='utf-8')
+        self._edge_file = open(os.path.join(self.output_dir, 'edges.csv'), 'w', newline='', encoding='utf-8')
+        self._nodes = csv.writer(self._node_file)
+        self._edges = csv.writer(self._edge_file)
+        self._nodes.writerow(['id', 'label', 'group'])
+        self._edges.writerow(['source', 'target'])
+
+    def write(self, chunk):
+        ids = self._stream.chunk_ids(chunk)
+        groups = [GROUPS[code] for code in chunk.group_codes.tolist()]
+        self._nodes.writerows(zip(ids, self._stream.chunk_labels(chunk), groups))
+
+        has_parent = chunk.parents >= 0
+        parent_ids = self._stream.node_ids(chunk.parents[has_parent])
+        self._edges.writerows(zip(parent_ids, (node for node, keep in zip(ids, has_parent.tolist()) if keep)))
+
+    def close(self):
+        self._node_file.close()
+        self._edge_file.close()
+
+
+class NpySink:
+    """One nodes-NNNNN.npy (position, group code, offering) and edges-NNNNN.npy (source, target) per chunk."""
+
+    node_dtype = np.dtype([('position', np.int64), ('group', np.uint8), ('offering', np.uint8)])
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def open(self, stream):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._part = 0
+
+    def write(self, chunk):
+        nodes = np.empty(len(chunk), dtype=self.node_dtype)
+        nodes['position'] = chunk.positions
+        nodes['group'] = chunk.group_codes
+        nodes['offering'] = chunk.offerings
+        has_parent = chunk.parents >= 0
+        edges = np.column_stack([chunk.parents[has_parent], chunk.positions[has_parent]])
+        np.save(os.path.join(self.output_dir, f'nodes-{self._part:05d}.npy'), nodes)
+        np.save(os.path.join(self.output_dir, f'edges-{self._part:05d}.npy'), edges)
+        self._part += 1
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """Parquet part files with the same integer columns as NpySink. Requires pyarrow."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def open(self, stream):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("ParquetSink requires pyarrow: pip install pyarrow") from e
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._part = 0
+
+    def write(self, chunk):
+        has_parent = chunk.parents >= 0
+        nodes = self._pa.table({'position': chunk.positions, 'group': chunk.group_codes,
+                                'offering': chunk.offerings})
+        edges = self._pa.table({'source': chunk.parents[has_parent], 'target': chunk.positions[has_parent]})
+        self._pq.write_table(nodes, os.path.join(self.output_dir, f'nodes-{self._part:05d}.parquet'))
+        self._pq.write_table(edges, os.path.join(self.output_dir, f'edges-{self._part:05d}.parquet'))
+        self._part += 1
+
+    def close(self):
+        pass
+
+
+SINKS = {'csv': CsvSink, 'npy': NpySink, 'parquet': ParquetSink}
+
+
+def write_graph_stream(stream, sink, progress=None):
+    """Drain `stream` into `sink` chunk by chunk. Returns row counts and throughput in rows per second."""
+    nodes = edges = 0
+    start_time = time.perf_counter()
+    sink.open(stream)
+    try:
+        for chunk in stream:
+            sink.write(chunk)
+            nodes += len(chunk)
+            edges += int((chunk.parents >= 0).sum())
+            if progress is not None:
+                elapsed = time.perf_counter() - start_time
+                progress(nodes, edges, (nodes + edges) / elapsed if elapsed else 0.0)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start_time
+    return {
+        'nodes': nodes,
+        'edges': edges,
+        'rows': nodes + edges,
+        'seconds': elapsed,
+        'rows_per_second': (nodes + edges) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a generated supply chain graph to disk.")
+    parser.add_argument('total_nodes', type=int)
+    parser.add_argument('output_dir')
+    parser.add_argument('--format', choices=sorted(SINKS), default='npy')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--density', type=float, default=0.5, help="density factor used for every offering")
+    parser.add_argument('--module-to-part-ratio', type=float, default=0.3)
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    density_factors = {offering_id: args.density for offering_id in OFFERING_IDS}
+    stream = GraphStream(args.total_nodes, density_factors, args.module_to_part_ratio, seed=args.seed,
+                         chunk_size=args.chunk_size)
+    stats = write_graph_stream(stream, SINKS[args.format](args.output_dir),
+                               progress=lambda n, e, rate: print(f"{n} nodes, {e} edges, {rate:,.0f} rows/s"))
+    print(f"Wrote {stats['nodes']} nodes and {stats['edges']} edges in {stats['seconds']:.2f} seconds "
+          f"({stats['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
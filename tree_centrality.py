@@ -0,0 +1,130 @@
+from collections import OrderedDict
+import numpy as np
+from graph_cache import graph_fingerprint
+from tree_layout import graph_arrays, bfs_forest
+from span_tracer import span
+
+# Selector names of the measures this engine computes, matching centrality_service.MEASURES
+TREE_MEASURES = ('Degree Centrality', 'Betweenness Centrality', 'Closeness Centrality', 'Eccentricity')
+MAX_CACHED_ENGINES = 4
+
+
+class TreeCentrality:
+    """Exact centralities of an undirected tree (or forest) in O(N), normalized the way networkx normalizes them.
+
+    One post-order pass over the BFS levels gives every subtree size and height. Removing a node splits its tree
+    into its child subtrees and the rest, so its betweenness is the number of pairs across those parts. One
+    rerooting pass gives the distance sum of every node from the root's (moving the root to a child brings that
+    child's subtree one step closer and everything else one step further) and the longest path leaving each node
+    upwards, which together with the subtree height is its eccentricity.
+    """
+
+    def __init__(self, G):
+        self.nodes, indptr, indices, rank = graph_arrays(G)
+        n = len(rank)
+        self.parent, self.depth, self.levels = bfs_forest(indptr, indices, rank)
+        self.degree = np.diff(indptr)
+        num_components = len(self.levels[0]) if self.levels else 0
+        # An acyclic graph has one edge fewer than nodes per component
+        self.is_tree = not G.is_directed() and len(indices) // 2 == n - num_components
+
+    @classmethod
+    def of(cls, G):
+        """The engine for G, or None when G is not an undirected tree or forest."""
+        engine = cls(G)
+        return engine if engine.is_tree else None
+
+    def _children(self):
+        # Every level but the roots, with each node's parent and the start of each run of siblings
+        for level in self.levels[1:]:
+            parents = self.parent[level]
+            starts = np.flatnonzero(np.concatenate([[True], parents[1:] != parents[:-1]]))
+            yield level, parents, starts
+
+    def _subtrees(self):
+        n = len(self.parent)
+        size = np.ones(n, dtype=np.int64)
+        height = np.zeros(n, dtype=np.int64)
+        for level, parents, starts in reversed(list(self._children())):
+            size += np.bincount(parents, weights=size[level], minlength=n).astype(np.int64)
+            height[parents[starts]] = np.maximum.reduceat(height[level] + 1, starts)
+        root = np.zeros(n, dtype=np.int64)
+        if self.levels:
+            root[self.levels[0]] = self.levels[0]
+        for level, parents, _ in self._children():
+            root[level] = root[parents]
+        return size, height, root
+
+    def degree_centrality(self):
+        n = len(self.parent)
+        return self.degree / (n - 1) if n > 1 else np.ones(n)
+
+    def betweenness_centrality(self):
+        n = len(self.parent)
+        if n <= 2:
+            return np.zeros(n)
+        size, _, root = self._subtrees()
+        component = size[root]
+        children = np.flatnonzero(self.parent != np.arange(n))
+        squares = np.bincount(self.parent[children], weights=size[children].astype(np.float64) ** 2, minlength=n)
+        # The parts left by removing a node: its child subtrees and the rest of its component
+        squares += (component - size).astype(np.float64) ** 2
+        pairs = ((component - 1).astype(np.float64) ** 2 - squares) / 2
+        return 2 * pairs / ((n - 1) * (n - 2))
+
+    def closeness_centrality(self):
+        n = len(self.parent)
+        size, _, root = self._subtrees()
+        component = size[root]
+        total = np.bincount(root, weights=self.depth, minlength=n)[root]
+        for level, parents, _ in self._children():
+            total[level] = total[parents] + component[level] - 2 * size[level]
+        reachable = (component - 1).astype(np.float64)
+        closeness = np.divide(reachable, total, out=np.zeros(n), where=total > 0)
+        return closeness * reachable / (n - 1) if n > 1 else closeness
+
+    def eccentricity(self):
+        n = len(self.parent)
+        _, height, _ = self._subtrees()
+        up = np.zeros(n, dtype=np.int64)
+        for level, parents, starts in self._children():
+            down = height[level] + 1
+            best = np.maximum.reduceat(down, starts)
+            group = np.cumsum(np.concatenate([[True], parents[1:] != parents[:-1]])) - 1
+            # The first child reaching the best height; its siblings leave through it, it leaves through the
+            # best of the others
+            positions = np.arange(len(level))
+            is_best = down == best[group]
+            first_best = np.minimum.reduceat(np.where(is_best, positions, len(level)), starts)
+            others = np.where(positions == first_best[group], 0, down)
+            second = np.maximum.reduceat(others, starts)
+            sideways = np.where(positions == first_best[group], second[group], best[group])
+            up[level] = 1 + np.maximum(up[parents], sideways)
+        return np.maximum(height, up)
+
+    def values(self, measure):
+        """{node: value} for one of TREE_MEASURES."""
+        compute = {
+            'Degree Centrality': self.degree_centrality,
+            'Betweenness Centrality': self.betweenness_centrality,
+            'Closeness Centrality': self.closeness_centrality,
+            'Eccentricity': self.eccentricity,
+        }[measure]
+        return dict(zip(self.nodes, compute().tolist()))
+
+
+_engines = OrderedDict()
+
+
+def get_tree_centrality(G):
+    """TreeCentrality of G (None when G is not a tree), reused while the graph version is unchanged."""
+    key = graph_fingerprint(G)
+    if key in _engines:
+        _engines.move_to_end(key)
+        return _engines[key]
+    with span("build tree centrality"):
+        engine = TreeCentrality.of(G)
+    _engines[key] = engine
+    while len(_engines) > MAX_CACHED_ENGINES:
+        _engines.popitem(last=False)
+    return engine
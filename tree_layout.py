@@ -0,0 +1,133 @@
+import numpy as np
+from compact_graph import CompactGraph, GROUPS
+
+# Preferred roots: the business group, then families, offerings, modules and parts
+GROUP_RANK = {'business_group': 0, 'family': 1, 'offering': 2, 'module': 3, 'make': 4, 'purchase': 4}
+
+
+def graph_arrays(G):
+    """(nodes, indptr, indices, rank) for any graph; `nodes` maps positions back to node IDs."""
+    if isinstance(G, CompactGraph):
+        rank = np.array([GROUP_RANK[group] for group in GROUPS], dtype=np.int64)[G.group_codes]
+        return G.nodes, G.indptr, G.indices, rank
+
+    nodes = list(G.nodes())
+    position = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+    edges = np.array([(position[u], position[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    rank = np.array([GROUP_RANK.get(data.get('group'), len(GROUP_RANK)) for _, data in G.nodes(data=True)],
+                    dtype=np.int64)
+    return nodes, indptr, cols[order], rank
+
+
+def expand_frontier(indptr, indices, frontier):
+    """All (source, neighbor) pairs of a frontier, gathered from CSR arrays in one vectorized step."""
+    starts = indptr[frontier].astype(np.int64)
+    counts = indptr[frontier + 1] - starts
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    return np.repeat(frontier, counts), indices[offsets + np.arange(int(counts.sum()))].astype(np.int64)
+
+
+def bfs_forest(indptr, indices, rank):
+    """Level-synchronous BFS spanning forest; each component is rooted at its lowest-rank node.
+
+    Returns (parent, depth, levels). levels[d] holds the nodes at depth d grouped by parent, in the order of
+    the previous level, so every subtree occupies a contiguous run of each level.
+    """
+    n = len(rank)
+    parent = np.full(n, -1, dtype=np.int64)
+    depth = np.full(n, -1, dtype=np.int64)
+    levels = []
+    unvisited = n
+
+    for root in np.argsort(rank, kind='stable').tolist():
+        if not unvisited:
+            break
+        if depth[root] >= 0:
+            continue
+        parent[root] = root
+        depth[root] = 0
+        frontier = np.array([root], dtype=np.int64)
+        d = 0
+        while len(frontier):
+            if len(levels) <= d:
+                levels.append([])
+            levels[d].append(frontier)
+            unvisited -= len(frontier)
+            sources, neighbors = expand_frontier(indptr, indices, frontier)
+            fresh = depth[neighbors] < 0
+            sources, neighbors = sources[fresh], neighbors[fresh]
+            # Keep the first discovery of each node; pairs are already in frontier order
+            _, first = np.unique(neighbors, return_index=True)
+            first.sort()
+            frontier = neighbors[first]
+            parent[frontier] = sources[first]
+            depth[frontier] = d + 1
+            d += 1
+
+    return parent, depth, [np.concatenate(level) for level in levels]
+
+
+def _leaf_extents(parent, levels, n):
+    """Horizontal extent of every node: leaves are one unit wide, parents span their children."""
+    weight = np.zeros(n)
+    for d in range(len(levels) - 1, -1, -1):
+        level = levels[d]
+        weight[level] = np.maximum(weight[level], 1)
+        if d:
+            weight += np.bincount(parent[level], weights=weight[level], minlength=n)
+
+    start = np.zeros(n)
+    roots = levels[0]
+    start[roots] = np.cumsum(weight[roots]) - weight[roots]
+    for level in levels[1:]:
+        offset = np.cumsum(weight[level]) - weight[level]
+        parents = parent[level]
+        is_first = np.concatenate([[True], parents[1:] != parents[:-1]])
+        group_first = np.flatnonzero(is_first)
+        start[level] = start[parents] + offset - offset[group_first][np.cumsum(is_first) - 1]
+
+    return start + weight / 2, float(weight[roots].sum())
+
+
+def tree_layout_arrays(G, kind='layered'):
+    """Node list and an (n, 2) coordinate array in [-1, 1], computed level by level from a BFS spanning tree.
+
+    kind='layered' puts each depth on its own row; kind='radial' puts each depth on its own ring. Edges
+    outside the spanning tree are drawn as usual but do not influence positions.
+    """
+    nodes, indptr, indices, rank = graph_arrays(G)
+    n = len(rank)
+    if n == 0:
+        return nodes, np.zeros((0, 2))
+
+    parent, depth, levels = bfs_forest(indptr, indices, rank)
+    center, width = _leaf_extents(parent, levels, n)
+    max_depth = max(len(levels) - 1, 1)
+
+    if kind == 'radial':
+        # A forest gets an empty centre so that several roots do not overlap
+        ring = depth if len(levels[0]) == 1 else depth + 1
+        radius = ring / (max_depth + (len(levels[0]) > 1))
+        theta = 2 * np.pi * center / width
+        coords = np.column_stack([radius * np.cos(theta), radius * np.sin(theta)])
+    elif kind == 'layered':
+        coords = np.column_stack([2 * center / width - 1, 1 - 2 * depth / max_depth])
+    else:
+        raise ValueError(f"Unknown tree layout: {kind}")
+    return nodes, coords
+
+
+def layered_layout(G):
+    nodes, coords = tree_layout_arrays(G, 'layered')
+    return dict(zip(nodes, coords))
+
+
+def radial_layout(G):
+    nodes, coords = tree_layout_arrays(G, 'radial')
+    return dict(zip(nodes, coords))